@@ -19,7 +19,13 @@ env = cdk.Environment(
 app = cdk.App()
 
 # Define and add stacks
-portfolio_stack = PortfolioCdkAppStack(app, "PortfolioCdkAppStack")
+# Serve the portfolio through CloudFront when PORTFOLIO_CLOUDFRONT=true, and
+# only upload changed files when PORTFOLIO_INCREMENTAL_DEPLOY=true
+portfolio_stack = PortfolioCdkAppStack(
+    app, "PortfolioCdkAppStack",
+    enable_cloudfront=os.getenv("PORTFOLIO_CLOUDFRONT", "false").lower() == "true",
+    incremental=os.getenv("PORTFOLIO_INCREMENTAL_DEPLOY", "false").lower() == "true"
+)
 ec2_stack = MyEc2Stack(app, "MyEc2Stack", env=env)
 jenkins_stack = MyJenkinsStack(app, "MyJenkinsStack", env=env)
 
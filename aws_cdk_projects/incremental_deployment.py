@@ -0,0 +1,95 @@
+import hashlib
+import os
+from typing import Dict, Optional
+
+from aws_cdk import (
+    aws_cloudfront as cloudfront,
+    aws_lambda as lambda_,
+    aws_s3 as s3,
+    aws_s3_assets as s3_assets,
+    custom_resources as cr,
+    CustomResource, Duration, RemovalPolicy
+)
+from constructs import Construct
+
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), "incremental_deployment_handler")
+
+
+class IncrementalDeployment(Construct):
+    """Deploy a directory tree to a bucket, copying only the files that changed.
+
+    Every file is its own CDK asset, so `cdk deploy` only uploads files
+    whose content changed. A custom resource then diffs the new file list
+    against the manifest the previous deploy stored in a private bucket
+    (never in the destination, which may be publicly readable),
+    copies changed objects server-side from the asset bucket, prunes
+    removed ones and invalidates only the changed pages.
+
+    `groups` maps a source directory to (Cache-Control, Content-Encoding,
+    immutable). Immutable files are never invalidated, and are kept for
+    one deploy after their removal so cached pages can still load them.
+    """
+
+    def __init__(self, scope: Construct, construct_id: str, groups: Dict[str, tuple],
+                 destination_bucket: s3.IBucket, distribution: Optional[cloudfront.IDistribution] = None) -> None:
+        super().__init__(scope, construct_id)
+
+        files = {}
+        for group_dir, (cache_control, content_encoding, immutable) in groups.items():
+            for root, dirs, names in os.walk(group_dir):
+                dirs.sort()
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    key = os.path.relpath(path, group_dir).replace(os.sep, "/")
+                    with open(path, "rb") as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()
+                    asset = s3_assets.Asset(self, "File-" + key.replace("/", "--"), path=path)
+                    files[key] = {
+                        "SourceBucket": asset.s3_bucket_name,
+                        "SourceKey": asset.s3_object_key,
+                        "Hash": digest,
+                        "CacheControl": cache_control,
+                        "ContentEncoding": content_encoding or "",
+                        "Immutable": "true" if immutable else "false",
+                    }
+
+        handler = lambda_.Function(
+            self, "Handler",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="index.on_event",
+            code=lambda_.Code.from_asset(HANDLER_DIR),
+            timeout=Duration.minutes(5),
+            memory_size=256,
+        )
+        # What was deployed; only the handler can read it
+        self.manifest_bucket = s3.Bucket(
+            self, "ManifestBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+        )
+        self.manifest_bucket.grant_read_write(handler)
+
+        # All file assets live in the same bootstrap bucket
+        if files:
+            asset.bucket.grant_read(handler)
+        destination_bucket.grant_read_write(handler)
+        destination_bucket.grant_delete(handler)
+        if distribution is not None:
+            distribution.grant_create_invalidation(handler)
+
+        provider = cr.Provider(self, "Provider", on_event_handler=handler)
+        properties = {
+            "DestinationBucket": destination_bucket.bucket_name,
+            "ManifestBucket": self.manifest_bucket.bucket_name,
+            "Files": files,
+        }
+        if distribution is not None:
+            properties["DistributionId"] = distribution.distribution_id
+        self.resource = CustomResource(
+            self, "Resource",
+            service_token=provider.service_token,
+            resource_type="Custom::IncrementalDeployment",
+            properties=properties,
+        )
@@ -0,0 +1,138 @@
+import json
+import logging
+import mimetypes
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Object recording what has been deployed, kept in a private manifest bucket:
+# a website bucket is publicly readable and would expose every key and hash
+MANIFEST_KEY = "deploy-manifest.json"
+
+# Where earlier versions stored the manifest, in the destination bucket
+LEGACY_MANIFEST_KEY = ".deploy-manifest.json"
+
+# Parallel server-side copies
+COPY_WORKERS = 16
+
+# Above this many changed paths, a single wildcard invalidation is cheaper
+MAX_INVALIDATION_PATHS = 100
+
+# Entry fields that, when changed, require the object to be copied again
+COMPARED_FIELDS = ("Hash", "CacheControl", "ContentEncoding")
+
+
+def is_immutable(entry: Dict) -> bool:
+    # CloudFormation passes custom resource properties as strings
+    return entry.get("Immutable") in (True, "true")
+
+
+def plan(deployed: Dict, files: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """Work out what a deploy has to do.
+
+    `deployed` is the stored manifest ({"files": {key: entry}, "retired":
+    [keys]}, empty on the first run) and `files` the new {key: entry}.
+    Returns the keys to copy (immutable ones first, so pages never point at
+    missing assets), the keys to delete, the immutable keys to retire and
+    the paths to invalidate.
+
+    Removed immutable files are kept for one more deploy ("retired"), so
+    pages still cached by visitors keep finding their hashed assets.
+    """
+    old = deployed.get("files", {})
+
+    def changed(key):
+        return key not in old or any(old[key].get(f) != files[key].get(f) for f in COMPARED_FIELDS)
+
+    copy = sorted((key for key in files if changed(key)), key=lambda key: (not is_immutable(files[key]), key))
+    removed = sorted(key for key in old if key not in files)
+    retired = [key for key in removed if is_immutable(old[key])]
+    delete = [key for key in removed if not is_immutable(old[key])]
+    delete += [key for key in deployed.get("retired", []) if key not in files]
+
+    # Changed and removed pages; hashed names are never reused, so never stale
+    invalidate = sorted({f"/{key}" for key in copy if not is_immutable(files[key])} |
+                        {f"/{key}" for key in delete if key in old})
+    if "/index.html" in invalidate:
+        invalidate.insert(0, "/")
+    return {"copy": copy, "delete": delete, "retired": retired, "invalidate": invalidate}
+
+
+def load_manifest(s3, bucket: str, key: str = MANIFEST_KEY) -> Dict:
+    try:
+        return json.loads(s3.get_object(Bucket=bucket, Key=key)["Body"].read())
+    except s3.exceptions.NoSuchKey:
+        return {}
+
+
+def copy_file(s3, bucket: str, key: str, entry: Dict):
+    """Server-side copy of one staged asset to its published key"""
+    extra = {
+        "ContentType": mimetypes.guess_type(key)[0] or "application/octet-stream",
+        "CacheControl": entry["CacheControl"],
+    }
+    if entry.get("ContentEncoding"):
+        extra["ContentEncoding"] = entry["ContentEncoding"]
+    s3.copy_object(
+        CopySource={"Bucket": entry["SourceBucket"], "Key": entry["SourceKey"]},
+        Bucket=bucket,
+        Key=key,
+        MetadataDirective="REPLACE",
+        **extra
+    )
+
+
+def deploy(props: Dict) -> Dict:
+    import boto3  # Provided by the Lambda runtime; imported here so plan() runs without it
+
+    s3 = boto3.client("s3")
+    bucket = props["DestinationBucket"]
+    manifest_bucket = props["ManifestBucket"]
+    files = props["Files"]
+    deployed = load_manifest(s3, manifest_bucket) or load_manifest(s3, bucket, LEGACY_MANIFEST_KEY)
+    actions = plan(deployed, files)
+    logger.info(f"Copying {len(actions['copy'])}, deleting {len(actions['delete'])} of {len(files)} files")
+
+    # Immutable files first, then the pages that reference them
+    for immutable in (True, False):
+        keys = [key for key in actions["copy"] if is_immutable(files[key]) == immutable]
+        with ThreadPoolExecutor(COPY_WORKERS) as pool:
+            list(pool.map(lambda key: copy_file(s3, bucket, key, files[key]), keys))
+
+    for start in range(0, len(actions["delete"]), 1000):
+        batch = actions["delete"][start:start + 1000]
+        s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True})
+
+    distribution_id = props.get("DistributionId")
+    if distribution_id and actions["invalidate"]:
+        paths = actions["invalidate"] if len(actions["invalidate"]) <= MAX_INVALIDATION_PATHS else ["/*"]
+        boto3.client("cloudfront").create_invalidation(
+            DistributionId=distribution_id,
+            InvalidationBatch={
+                "Paths": {"Quantity": len(paths), "Items": paths},
+                "CallerReference": str(time.time())
+            }
+        )
+
+    # Record the deploy last: if any step failed, the next deploy redoes it
+    manifest = {
+        "files": {key: {**{f: entry.get(f) for f in COMPARED_FIELDS}, "Immutable": is_immutable(entry)}
+                  for key, entry in files.items()},
+        "retired": actions["retired"]
+    }
+    s3.put_object(Bucket=manifest_bucket, Key=MANIFEST_KEY, Body=json.dumps(manifest).encode(),
+                  ContentType="application/json")
+    s3.delete_object(Bucket=bucket, Key=LEGACY_MANIFEST_KEY)
+    return {key: len(value) for key, value in actions.items()}
+
+
+def on_event(event, context):
+    """Custom resource entry point; deleting the resource leaves the files in place"""
+    props = event["ResourceProperties"]
+    physical_id = event.get("PhysicalResourceId") or f"{props['DestinationBucket']}-incremental-deployment"
+    if event["RequestType"] == "Delete":
+        return {"PhysicalResourceId": physical_id}
+    return {"PhysicalResourceId": physical_id, "Data": deploy(props)}
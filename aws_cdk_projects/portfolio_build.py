@@ -0,0 +1,324 @@
+import gzip
+import hashlib
+import html
+import json
+import os
+import posixpath
+import re
+import shutil
+from typing import Dict, List, Tuple
+
+from aws_cdk_projects import portfolio_images
+from aws_cdk_projects.portfolio_images import (
+    RESPONSIVE_EXTENSIONS, image_variants, render_responsive_images, variant_path
+)
+
+# Files that get a content hash in their name and are cached forever
+HASHED_EXTENSIONS = {'.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.avif', '.ico',
+                     '.woff', '.woff2'}
+
+# Text files that are stored gzip-encoded
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml'}
+
+# Source files that are never published
+EXCLUDED_NAMES = {'README.md'}
+
+# Cache-Control of each kind of object
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+SHORT_CACHE_CONTROL = 'public, max-age=300, must-revalidate'
+
+# Deployment groups: build subdirectory -> (Cache-Control, gzip-encoded)
+DEPLOYMENT_GROUPS = {
+    'hashed': (IMMUTABLE_CACHE_CONTROL, False),
+    'hashed-gzip': (IMMUTABLE_CACHE_CONTROL, True),
+    'mutable': (SHORT_CACHE_CONTROL, False),
+    'mutable-gzip': (SHORT_CACHE_CONTROL, True),
+}
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE = re.compile(r'\s*([{};,>])\s*')
+CSS_DECLARATIONS = re.compile(r'\{([^{}]*)\}')
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+HTML_REFERENCE = re.compile(r'\b(href|src)=([\'"])([^\'"]+)\2')
+HTML_SRCSET = re.compile(r'\b(srcset)=([\'"])([^\'"]+)\2')
+
+# Placeholder in pages that is replaced by the rendered project cards
+PROJECTS_DATA = 'data/projects.json'
+PROJECTS_PLACEHOLDER = re.compile(r'([ \t]*)<!-- projects:start -->.*?<!-- projects:end -->', re.S)
+
+# Markup of one project card, the same as js/projects.js builds
+PROJECT_CARD = """<article class="project-card">
+    <div class="project-icon">
+        <i class="fas {icon}"></i>
+    </div>
+    <div class="project-content">
+        <h2>{name}</h2>
+        <p>{description}</p>
+        <div class="tech-stack">
+            {tools}
+        </div>
+        <div class="project-actions">
+            <a href="{doc_url}" class="btn primary" data-tooltip="View detailed documentation">
+                <i class="fas fa-book"></i> View Documentation
+            </a>
+            <a href="{github_url}" class="btn secondary" target="_blank">
+                <i class="fab fa-github"></i> Source
+            </a>
+        </div>
+    </div>
+</article>"""
+
+
+def minify_css(text: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet"""
+    text = CSS_COMMENT.sub('', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = CSS_SPACE.sub(r'\1', text)
+    # Innermost blocks only hold declarations, where space around ':' is noise
+    text = CSS_DECLARATIONS.sub(lambda match: '{' + re.sub(r'\s*:\s*', ':', match.group(1)) + '}', text)
+    return text.replace(';}', '}').strip()
+
+
+def scan_js_line(line: str, stack: List[str], in_comment: bool) -> Tuple[List[str], bool]:
+    """Track template literals and block comments across one line of a script.
+
+    `stack` holds the open template literals ('`') and the ${...}
+    expressions inside them ('{'); quoted strings and line comments end
+    with the line. Returns the state at the end of the line.
+    """
+    stack = list(stack)
+    quote = None
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if in_comment:
+            if line.startswith('*/', i):
+                in_comment = False
+                i += 1
+        elif quote or (stack and stack[-1] == '`'):
+            if char == '\\':
+                i += 1  # Skip the escaped character
+            elif quote and char == quote:
+                quote = None
+            elif not quote and char == '`':
+                stack.pop()
+            elif not quote and line.startswith('${', i):
+                stack.append('{')
+                i += 1
+        elif line.startswith('//', i):
+            break
+        elif line.startswith('/*', i):
+            in_comment = True
+            i += 1
+        elif char in '\'"':
+            quote = char
+        elif char == '`':
+            stack.append('`')
+        elif char == '{' and stack:
+            stack.append('{')
+        elif char == '}' and stack:
+            stack.pop()
+        i += 1
+    return stack, in_comment
+
+
+def minify_js(text: str) -> str:
+    """Strip indentation, blank lines and whole-line comments from a script.
+
+    Line breaks are kept, so automatic semicolon insertion is never
+    affected. Lines that start inside a multi-line template literal are
+    kept as they are, since their whitespace and any '//' belong to the
+    string.
+    """
+    lines = []
+    stack, in_comment = [], False
+    for line in text.splitlines():
+        if stack and stack[-1] == '`':
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('//'):
+                lines.append(stripped)
+        stack, in_comment = scan_js_line(line, stack, in_comment)
+    return '\n'.join(lines) + '\n'
+
+
+def content_hash(data: bytes, length: int = 10) -> str:
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def hashed_path(path: str, data: bytes) -> str:
+    """'css/style.css' -> 'css/style.<hash>.css'"""
+    root, extension = posixpath.splitext(path)
+    return f'{root}.{content_hash(data)}{extension}'
+
+
+def resolve_reference(base: str, reference: str, mapping: Dict[str, str]):
+    """Return `reference` rewritten to its hashed name, or None if it isn't a built file.
+
+    `base` is the path of the referencing file; references are resolved
+    relative to its directory, like the browser does.
+    """
+    if re.match(r'^[a-z][a-z0-9+.-]*:|^//|^#', reference, re.I):
+        return None  # Absolute URL, protocol-relative URL or fragment
+    path, _, suffix = reference.partition('?')
+    target = posixpath.normpath(posixpath.join(posixpath.dirname(base), path))
+    if target not in mapping:
+        return None
+    rewritten = posixpath.relpath(mapping[target], posixpath.dirname(base) or '.')
+    return rewritten + (f'?{suffix}' if suffix else '')
+
+
+def rewrite_css(path: str, text: str, mapping: Dict[str, str]) -> str:
+    def replace(match):
+        rewritten = resolve_reference(path, match.group(2), mapping)
+        return match.group(0) if rewritten is None else f'url({match.group(1)}{rewritten}{match.group(1)})'
+    return CSS_URL.sub(replace, text)
+
+
+def rewrite_html(path: str, text: str, mapping: Dict[str, str]) -> str:
+    """Point href/src/srcset attributes that name built files at their hashed names"""
+    def replace(match):
+        rewritten = resolve_reference(path, match.group(3), mapping)
+        quote = match.group(2)
+        return match.group(0) if rewritten is None else f'{match.group(1)}={quote}{rewritten}{quote}'
+
+    def replace_srcset(match):
+        candidates = []
+        for candidate in match.group(3).split(','):
+            url, _, descriptor = candidate.strip().partition(' ')
+            url = resolve_reference(path, url, mapping) or url
+            candidates.append(f'{url} {descriptor}'.strip())
+        quote = match.group(2)
+        return f'{match.group(1)}={quote}{", ".join(candidates)}{quote}'
+    return HTML_SRCSET.sub(replace_srcset, HTML_REFERENCE.sub(replace, text))
+
+
+def render_project_card(project: Dict) -> str:
+    escape = html.escape
+    return PROJECT_CARD.format(
+        icon=escape(project['icon']),
+        name=escape(project['name']),
+        description=escape(project['description']),
+        tools=''.join(f'<span>{escape(tool)}</span>' for tool in project['tools']),
+        doc_url=escape(project['docUrl']),
+        github_url=escape(project['githubUrl'])
+    )
+
+
+def render_projects(text: str, data: bytes) -> str:
+    """Replace the projects placeholder of a page with the cards of every project"""
+    projects = json.loads(data)['projects']
+
+    def replace(match):
+        indent = match.group(1)
+        cards = '\n'.join(render_project_card(project) for project in projects)
+        return '\n'.join(indent + line if line else line for line in cards.splitlines())
+    return PROJECTS_PLACEHOLDER.sub(replace, text)
+
+
+def is_hashed(path: str) -> bool:
+    return posixpath.splitext(path)[1].lower() in HASHED_EXTENSIONS
+
+
+def deployment_group(path: str, hashed: bool) -> str:
+    extension = posixpath.splitext(path)[1].lower()
+    group = 'hashed' if hashed else 'mutable'
+    return group + '-gzip' if extension in COMPRESSIBLE_EXTENSIONS else group
+
+
+def build_portfolio(source_dir: str, build_dir: str, compress: bool = True,
+                    image_cache_dir: str = None) -> Dict[str, str]:
+    """Build the deployable site from `source_dir` into `build_dir`.
+
+    Stylesheets and scripts are minified, every static asset gets a
+    content-hashed name and the references to it in HTML and CSS are
+    rewritten. Pages with a projects placeholder get the project cards from
+    data/projects.json rendered in, so they need no script to show them.
+    With Pillow installed, PNG and JPEG images get resized AVIF/WebP
+    variants (cached in `image_cache_dir` by content hash) and the <img>
+    tags showing them become <picture> elements with srcsets; the original
+    is dropped unless something still references it.
+    Text files are gzip-compressed unless `compress` is False
+    (e.g. when a CDN compresses them per client). Output is split into one
+    subdirectory per DEPLOYMENT_GROUPS entry, so each can be uploaded with
+    its own Cache-Control and Content-Encoding.
+
+    The output is deterministic (gzip headers carry no timestamp), so an
+    unchanged site produces identical CDK assets and nothing is uploaded.
+    Returns the mapping of source paths to published paths.
+    """
+    sources = {}
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name in EXCLUDED_NAMES or name.startswith('.'):
+                continue
+            full_path = os.path.join(root, name)
+            path = os.path.relpath(full_path, source_dir).replace(os.sep, '/')
+            with open(full_path, 'rb') as f:
+                sources[path] = f.read()
+
+    def extension(path):
+        return posixpath.splitext(path)[1].lower()
+
+    # Responsive variants are built before hashing, so they get hashed names too
+    responsive = {}
+    images = [path for path in sources if extension(path) in RESPONSIVE_EXTENSIONS]
+    if images and not portfolio_images.available():
+        print("WARNING: Pillow is not installed (pip install -r requirements.txt), "
+              "publishing images without responsive variants")
+    elif images:
+        for path in images:
+            try:
+                variants = image_variants(sources[path], image_cache_dir)
+            except (OSError, ValueError) as e:
+                print(f"Error optimizing image {path}, publishing it as it is: {e}")
+                continue
+            for variant in variants:
+                sources[variant_path(path, variant)] = variant['data']
+            responsive[path] = variants
+
+    # Hash leaves first: stylesheets may reference images, and a file's hash
+    # must cover the rewritten references
+    order = {'.css': 1, '.html': 2}
+    mapping, outputs = {}, {}
+    for path in sorted(sources, key=lambda p: (order.get(extension(p), 0), p)):
+        data = sources[path]
+        if extension(path) == '.css':
+            data = minify_css(rewrite_css(path, data.decode('utf-8'), mapping)).encode('utf-8')
+        elif extension(path) == '.js':
+            data = minify_js(data.decode('utf-8')).encode('utf-8')
+        elif extension(path) == '.html':
+            text = data.decode('utf-8')
+            if PROJECTS_DATA in sources:
+                text = render_projects(text, sources[PROJECTS_DATA])
+            text = render_responsive_images(path, text, responsive)
+            data = rewrite_html(path, text, mapping).encode('utf-8')
+
+        hashed = is_hashed(path)
+        published = hashed_path(path, data) if hashed else path
+        mapping[path] = published
+        outputs[published] = (deployment_group(path, hashed), data)
+
+    # Originals whose every <img> became a <picture> are dead weight; keep
+    # them only while a stylesheet, script or authored srcset names them.
+    # Hashed names are unique, so looking for the file name is enough.
+    texts = [data for published, (_, data) in outputs.items() if extension(published) in COMPRESSIBLE_EXTENSIONS]
+    for path in responsive:
+        name = posixpath.basename(mapping[path]).encode()
+        if not any(name in data for data in texts):
+            del outputs[mapping.pop(path)]
+
+    shutil.rmtree(build_dir, ignore_errors=True)
+    for group in DEPLOYMENT_GROUPS:
+        os.makedirs(os.path.join(build_dir, group))
+    for published, (group, data) in outputs.items():
+        target = os.path.join(build_dir, group, *published.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if compress and group.endswith('-gzip'):
+            data = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(target, 'wb') as f:
+            f.write(data)
+    return mapping
+
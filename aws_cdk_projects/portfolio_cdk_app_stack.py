@@ -1,28 +1,49 @@
+import os
+
 from aws_cdk import (
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
     aws_s3 as s3,
     aws_s3_deployment as s3_deployment,
-    RemovalPolicy,
+    Duration, RemovalPolicy,
     Stack, CfnOutput
 )
 from constructs import Construct
 
+from aws_cdk_projects.incremental_deployment import IncrementalDeployment
+from aws_cdk_projects.portfolio_build import DEPLOYMENT_GROUPS, HASHED_EXTENSIONS, build_portfolio, is_hashed
+
 class PortfolioCdkAppStack(Stack):
 
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, source_dir: str = "./portfolio_files",
+                 build_dir: str = "./.portfolio_build", cache_dir: str = "./.portfolio_cache",
+                 enable_cloudfront: bool = False,
+                 incremental: bool = False, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         try:
-            # Create an S3 bucket for hosting the portfolio
-            portfolio_bucket = s3.Bucket(
-                self,
-                "PortfolioBucket",
-                website_index_document="index.html",  # Set index.html as the entry point
-                public_read_access=True,             # Enable public read access
-                block_public_access=s3.BlockPublicAccess.BLOCK_ACLS,  # Allow public access
-                removal_policy=RemovalPolicy.DESTROY,  # Allow CDK to delete the bucket
-                auto_delete_objects=True  # Ensures objects are removed before deletion
-            )
-            
+            if enable_cloudfront:
+                # Private bucket, only readable by the distribution
+                portfolio_bucket = s3.Bucket(
+                    self,
+                    "PortfolioBucket",
+                    block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+                    enforce_ssl=True,
+                    removal_policy=RemovalPolicy.DESTROY,  # Allow CDK to delete the bucket
+                    auto_delete_objects=True  # Ensures objects are removed before deletion
+                )
+            else:
+                # Create an S3 bucket for hosting the portfolio
+                portfolio_bucket = s3.Bucket(
+                    self,
+                    "PortfolioBucket",
+                    website_index_document="index.html",  # Set index.html as the entry point
+                    public_read_access=True,             # Enable public read access
+                    block_public_access=s3.BlockPublicAccess.BLOCK_ACLS,  # Allow public access
+                    removal_policy=RemovalPolicy.DESTROY,  # Allow CDK to delete the bucket
+                    auto_delete_objects=True  # Ensures objects are removed before deletion
+                )
+
             # Output the bucket name
             CfnOutput(
                 self, "BucketName",
@@ -34,22 +55,161 @@ class PortfolioCdkAppStack(Stack):
             print(f"Error creating S3 bucket: {e}")
             return
 
+        # Minify and fingerprint the static files and build responsive images
+        # (reused from cache_dir while unchanged). CloudFront compresses per
+        # client (brotli or gzip), so files are only pre-compressed without it.
+        published = list(build_portfolio(
+            source_dir, build_dir, compress=not enable_cloudfront,
+            image_cache_dir=os.path.join(cache_dir, "images")
+        ).values())
+
+        distribution = None
+        if enable_cloudfront:
+            try:
+                distribution = self.create_distribution(portfolio_bucket, published)
+            except Exception as e:
+                print(f"Error creating CloudFront distribution: {e}")
+                return
+
         try:
-            # Deploy static asset files to the S3 bucket
-            deployment = s3_deployment.BucketDeployment(
-                self,
-                "DeployPortfolioAssets",
-                sources=[s3_deployment.Source.asset("./portfolio_files")],  # Path to your static files
-                destination_bucket=portfolio_bucket,
+            if incremental:
+                # Upload and copy only the files that changed since the last deploy
+                IncrementalDeployment(
+                    self,
+                    "DeployPortfolio",
+                    groups={
+                        os.path.join(build_dir, group): (
+                            cache_control,
+                            "gzip" if gzipped and distribution is None else None,
+                            group.startswith("hashed")
+                        )
+                        for group, (cache_control, gzipped) in DEPLOYMENT_GROUPS.items()
+                    },
+                    destination_bucket=portfolio_bucket,
+                    distribution=distribution,
+                )
+                self.output_website_url(portfolio_bucket, distribution)
+                return
+
+            # One deployment per cache/encoding group
+            group_paths = {}
+            for group in DEPLOYMENT_GROUPS:
+                group_dir = os.path.join(build_dir, group)
+                group_paths[group] = sorted(
+                    os.path.relpath(os.path.join(root, name), group_dir).replace(os.sep, "/")
+                    for root, _, files in os.walk(group_dir) for name in files
+                )
+
+            # Hashed assets are never pruned, so pages cached by visitors keep
+            # finding the assets of the previous deploy. Pages and data have
+            # stable names and are pruned, so removed ones disappear; pruning
+            # skips hashed assets and the other page group's files.
+            hashed_patterns = [pattern for extension in sorted(HASHED_EXTENSIONS)
+                               for pattern in (f"*{extension}", f"*{extension.upper()}")]
+
+            asset_deployments, page_deployments = [], []
+            for group, (cache_control, gzipped) in DEPLOYMENT_GROUPS.items():
+                paths = group_paths[group]
+                if not paths:
+                    continue
+
+                group_dir = os.path.join(build_dir, group)
+                hashed = group.startswith("hashed")
+                other_pages = [path for other, other_paths in group_paths.items()
+                               if other != group and not other.startswith("hashed") for path in other_paths]
+                # Hashed files never change, so only the unhashed ones are invalidated
+                invalidate = distribution is not None and not hashed
+                deployment = s3_deployment.BucketDeployment(
+                    self,
+                    f"DeployPortfolio-{group}",
+                    sources=[s3_deployment.Source.asset(group_dir)],
+                    destination_bucket=portfolio_bucket,
+                    cache_control=[s3_deployment.CacheControl.from_string(cache_control)],
+                    content_encoding="gzip" if gzipped and distribution is None else None,
+                    distribution=distribution if invalidate else None,
+                    distribution_paths=["/"] + ["/" + path for path in paths] if invalidate else None,
+                    prune=not hashed,
+                    exclude=None if hashed else hashed_patterns + other_pages,
+                )
+                if hashed:
+                    asset_deployments.append(deployment)
+                else:
+                    page_deployments.append(deployment)
+
+            # Publish pages only after the assets they reference exist
+            for deployment in page_deployments:
+                for asset_deployment in asset_deployments:
+                    deployment.node.add_dependency(asset_deployment)
+
+            self.output_website_url(portfolio_bucket, distribution)
+
+        except Exception as e:
+            print(f"Error deploying static files to S3 bucket: {e}")
+            return
+
+    def output_website_url(self, bucket: s3.IBucket, distribution: cloudfront.Distribution = None) -> None:
+        if distribution is not None:
+            # Output the distribution URL
+            CfnOutput(
+                self, "WebsiteURL",
+                value=f"https://{distribution.distribution_domain_name}",
+                description="The URL of the CloudFront distribution serving the portfolio website"
             )
+        else:
             # Output the bucket website URL
             CfnOutput(
                 self, "WebsiteURL",
-                value=portfolio_bucket.bucket_website_url,
+                value=bucket.bucket_website_url,
                 description="The URL of the S3 bucket hosting the portfolio website"
             )
 
-        except Exception as e:
-            print(f"Error deploying static files to S3 bucket: {e}")
-            return
+    def create_distribution(self, bucket: s3.IBucket, published) -> cloudfront.Distribution:
+        """CloudFront distribution reading the bucket through origin access control"""
+        origin = origins.S3BucketOrigin.with_origin_access_control(bucket)
+
+        def cache_policy(name, default_ttl, max_ttl, min_ttl=Duration.seconds(0)):
+            # Cache keys ignore cookies, headers and query strings; compressed
+            # variants are cached separately per Accept-Encoding
+            return cloudfront.CachePolicy(
+                self, name,
+                default_ttl=default_ttl,
+                max_ttl=max_ttl,
+                min_ttl=min_ttl,
+                cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+                header_behavior=cloudfront.CacheHeaderBehavior.none(),
+                query_string_behavior=cloudfront.CacheQueryStringBehavior.none(),
+                enable_accept_encoding_gzip=True,
+                enable_accept_encoding_brotli=True,
+            )
+
+        # Pages follow the origin's short Cache-Control and are invalidated on deploy
+        html_policy = cache_policy("PortfolioHtmlCachePolicy", Duration.minutes(5), Duration.days(1))
+        # Hashed names change with their content, so they can be cached for a year
+        asset_policy = cache_policy("PortfolioAssetCachePolicy", Duration.days(365), Duration.days(365))
+        # Project data may be edited without a page change; keep it fresh
+        data_policy = cache_policy("PortfolioDataCachePolicy", Duration.minutes(1), Duration.minutes(5))
+
+        def behavior(policy):
+            return cloudfront.BehaviorOptions(
+                origin=origin,
+                cache_policy=policy,
+                compress=True,
+                viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD,
+            )
+
+        # Top-level directories holding hashed files, e.g. css/*, js/*, assets/*
+        asset_dirs = sorted({path.split("/")[0] for path in published if is_hashed(path) and "/" in path})
+        additional_behaviors = {f"{directory}/*": behavior(asset_policy) for directory in asset_dirs}
+        if any(path.startswith("data/") for path in published):
+            additional_behaviors["data/*"] = behavior(data_policy)
 
+        return cloudfront.Distribution(
+            self,
+            "PortfolioDistribution",
+            default_behavior=behavior(html_policy),
+            additional_behaviors=additional_behaviors,
+            default_root_object="index.html",
+            http_version=cloudfront.HttpVersion.HTTP2_AND_3,
+            comment="Portfolio website",
+        )
@@ -0,0 +1,213 @@
+import hashlib
+import html
+import io
+import json
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image, features
+except ImportError:  # Optional: without Pillow, images are published as they are
+    Image = None
+
+# Raster images that get responsive variants
+RESPONSIVE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+
+# Variant widths in pixels; images are never upscaled, and their own width
+# is always the largest variant
+IMAGE_WIDTHS = (160, 320, 640, 960, 1280, 1920)
+
+# Modern encodings, best first, with their MIME types and quality
+MODERN_FORMATS = {
+    'avif': ('image/avif', 60),
+    'webp': ('image/webp', 80),
+}
+JPEG_QUALITY = 82
+
+# Part of the cache key: bump it when the encoding settings change
+CACHE_VERSION = 1
+
+IMG_TAG = re.compile(r'<img\b[^>]*>', re.I)
+
+
+class _TagParser(HTMLParser):
+    """Collect the attributes of the first start tag fed to it"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.attributes = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.attributes is None:
+            self.attributes = dict(attrs)
+
+    handle_startendtag = handle_starttag
+
+
+def parse_attributes(tag: str) -> Dict[str, Optional[str]]:
+    """Attributes of a start tag, in order; valueless ones (e.g. `hidden`) map to None.
+
+    Quoted, unquoted and boolean attributes are all recognized, and
+    character references in values are decoded.
+    """
+    parser = _TagParser()
+    parser.feed(tag)
+    parser.close()
+    return parser.attributes or {}
+
+
+def render_attributes(attributes: Dict[str, Optional[str]]) -> str:
+    return ' '.join(name if value is None else f'{name}="{html.escape(value, quote=True)}"'
+                    for name, value in attributes.items())
+
+
+def available() -> bool:
+    return Image is not None
+
+
+def modern_formats() -> List[str]:
+    """Modern formats the installed Pillow can encode, best first"""
+    if Image is None:
+        return []
+    return [name for name in MODERN_FORMATS if features.check(name)]
+
+
+def encode(image, image_format: str) -> bytes:
+    out = io.BytesIO()
+    if image_format == 'png':
+        image.save(out, 'PNG', optimize=True)
+    elif image_format == 'jpg':
+        image.convert('RGB').save(out, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(out, image_format.upper(), quality=MODERN_FORMATS[image_format][1])
+    return out.getvalue()
+
+
+def encode_variants(data: bytes) -> List[Dict]:
+    """Resize and encode one image into every width and format.
+
+    Returns dicts with 'name' (e.g. '640w.webp'), 'width', 'height',
+    'format' and 'data'. The fallback format is JPEG for opaque images and
+    PNG for ones with transparency.
+    """
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    fallback = 'png' if has_alpha else 'jpg'
+
+    width, height = image.size
+    widths = [w for w in IMAGE_WIDTHS if w < width] + [width]
+    variants = []
+    for variant_width in widths:
+        variant_height = max(1, round(height * variant_width / width))
+        resized = image if variant_width == width else image.resize((variant_width, variant_height), Image.LANCZOS)
+        for image_format in modern_formats() + [fallback]:
+            variants.append({
+                'name': f'{variant_width}w.{image_format}',
+                'width': variant_width,
+                'height': variant_height,
+                'format': image_format,
+                'data': encode(resized, image_format)
+            })
+    return variants
+
+
+def cache_key(data: bytes) -> str:
+    settings = json.dumps([CACHE_VERSION, IMAGE_WIDTHS, MODERN_FORMATS, JPEG_QUALITY, modern_formats()])
+    return hashlib.sha256(settings.encode() + data).hexdigest()[:32]
+
+
+def image_variants(data: bytes, cache_dir: Optional[str] = None) -> List[Dict]:
+    """encode_variants(), cached in `cache_dir` by content hash.
+
+    Cached variants are read back byte for byte, so an unchanged image
+    is never re-encoded and yields identical files on every build.
+    """
+    if cache_dir is None:
+        return encode_variants(data)
+
+    entry = os.path.join(cache_dir, cache_key(data))
+    index = os.path.join(entry, 'variants.json')
+    if os.path.exists(index):
+        with open(index) as f:
+            variants = json.load(f)
+        for variant in variants:
+            with open(os.path.join(entry, variant['name']), 'rb') as f:
+                variant['data'] = f.read()
+        return variants
+
+    variants = encode_variants(data)
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir)
+    for variant in variants:
+        with open(os.path.join(staging, variant['name']), 'wb') as f:
+            f.write(variant['data'])
+    with open(os.path.join(staging, 'variants.json'), 'w') as f:
+        json.dump([{k: v for k, v in variant.items() if k != 'data'} for variant in variants], f)
+    try:
+        os.rename(staging, entry)
+    except OSError:  # Another build cached it first
+        shutil.rmtree(staging, ignore_errors=True)
+    return variants
+
+
+def variant_path(path: str, variant: Dict) -> str:
+    """'assets/images/profile.png' -> 'assets/images/profile-640w.webp'"""
+    return f'{posixpath.splitext(path)[0]}-{variant["name"]}'
+
+
+def render_picture(tag: str, variants: List[Dict], path: str) -> str:
+    """Turn an <img> tag into a <picture> with a srcset per format.
+
+    The <img> keeps its attributes (values re-escaped), falls back to the largest variant in
+    the original's format and gets the intrinsic width and height so the
+    browser can reserve space. Without a `sizes` attribute, `100vw` is
+    assumed.
+    """
+    attributes = parse_attributes(tag)
+    sizes = attributes.get('sizes') or '100vw'
+
+    def srcset(image_format):
+        return ', '.join(f'{variant_path(path, v)} {v["width"]}w' for v in variants if v['format'] == image_format)
+
+    fallback_format = variants[-1]['format']
+    largest = variants[-1]
+    img = dict(attributes, src=variant_path(path, largest), srcset=srcset(fallback_format), sizes=sizes)
+    img.setdefault('width', str(largest['width']))
+    img.setdefault('height', str(largest['height']))
+
+    sources = [
+        '<source ' + render_attributes({'type': MODERN_FORMATS[image_format][0], 'srcset': srcset(image_format),
+                                        'sizes': sizes}) + '>'
+        for image_format in MODERN_FORMATS if any(v['format'] == image_format for v in variants)
+    ]
+    img_tag = '<img ' + render_attributes(img) + '>'
+    return '<picture>' + ''.join(sources) + img_tag + '</picture>'
+
+
+def render_responsive_images(page: str, text: str, responsive: Dict[str, List[Dict]]) -> str:
+    """Replace <img> tags of `page` that show a responsive image with <picture> markup.
+
+    `responsive` maps source image paths to their variants; images whose
+    tag already has a srcset are left to the author.
+    """
+    def replace(match):
+        tag = match.group(0)
+        attributes = parse_attributes(tag)
+        src = attributes.get('src') or ''
+        if 'srcset' in attributes or re.match(r'^[a-z][a-z0-9+.-]*:|^//', src, re.I):
+            return tag
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(page), src.partition('?')[0]))
+        if path not in responsive:
+            return tag
+        variants = responsive[path]
+        # Variant paths in the markup are relative to the page, like the original src
+        relative = posixpath.relpath(path, posixpath.dirname(page) or '.')
+        return render_picture(tag, variants, relative)
+    return IMG_TAG.sub(replace, text)
@@ -1,60 +1,3 @@
-// Project data
-const projectsData = {
-    "projects": [
-        {
-            "name": "Todo",
-            "description": "A full-stack Todo app built using the MERN stack. Features include task creation, updates, and deletion. The app is containerized using Docker and includes CI/CD pipelines powered by Semaphore and GitHub Actions for seamless deployments.",
-            "icon": "fa-tasks",
-            "tools": [
-                "MERN Stack",
-                "Docker",
-                "Semaphore CI",
-                "GitHub Actions"
-            ],
-            "docUrl": "https://docs.todo-app.com",
-            "githubUrl": "https://github.com/yourusername/todo-app"
-        },
-        {
-            "name": "TaskFlow",
-            "description": "A task management system leveraging AWS Serverless architecture. The backend is built with Lambda Functions, Cognito for user authentication, SES for email notifications, and API Gateway. The system is deployed via Amplify, with CI/CD pipelines implemented using GitHub Actions.",
-            "icon": "fa-cloud",
-            "tools": [
-                "AWS Serverless",
-                "Lambda",
-                "Cognito",
-                "API Gateway",
-                "Amplify"
-            ],
-            "docUrl": "https://docs.taskflow.com",
-            "githubUrl": "https://github.com/yourusername/taskflow"
-        },
-        {
-            "name": "Kubernetes Monitoring Stack",
-            "description": "Automated deployment of Prometheus and Grafana for comprehensive cluster monitoring. Includes custom dashboards and alerting rules.",
-            "icon": "fa-kubernetes",
-            "tools": [
-                "Kubernetes",
-                "Prometheus",
-                "Grafana"
-            ],
-            "docUrl": "https://docs.k8s-monitoring.com",
-            "githubUrl": "https://github.com/yourusername/k8s-monitoring"
-        },
-        {
-            "name": "Container Orchestration",
-            "description": "Docker Compose and Kubernetes configurations for a microservices architecture. Features auto-scaling and load balancing.",
-            "icon": "fa-docker",
-            "tools": [
-                "Docker",
-                "Kubernetes",
-                "Helm"
-            ],
-            "docUrl": "https://docs.container-orch.com",
-            "githubUrl": "https://github.com/yourusername/container-orchestration"
-        }
-    ]
-};
-
 // Function to create a project card
 const createProjectCard = (project) => {
     return `
@@ -81,17 +24,21 @@ const createProjectCard = (project) => {
     `;
 };
 
-// Function to load and render projects
+// Function to load and render projects. The build renders the cards into
+// projects.html, so this only runs when the page is opened without a build.
 const loadProjects = async () => {
     const container = document.getElementById('projects-container');
-    
+    if (container.querySelector('.project-card')) {
+        return;
+    }
+
     try {
-        // Use the embedded project data directly
+        const response = await fetch('data/projects.json');
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const projectsData = await response.json();
         container.innerHTML = projectsData.projects.map(project => createProjectCard(project)).join('');
-        
-        // Initialize animations after loading projects
-        observeProjectCards();
-        addTechStackHoverEffect();
     } catch (error) {
         console.error('Error loading projects:', error);
         container.innerHTML = `
@@ -104,15 +51,18 @@ const loadProjects = async () => {
     }
 };
 
-// Add smooth reveal animation for project cards
+// Add smooth reveal animation for project cards below the fold; cards
+// already on screen stay visible so rendered content never flashes
 const observeProjectCards = () => {
-    const cards = document.querySelectorAll('.project-card');
+    const cards = Array.from(document.querySelectorAll('.project-card'))
+        .filter(card => card.getBoundingClientRect().top > window.innerHeight);
     
     const observer = new IntersectionObserver((entries) => {
         entries.forEach(entry => {
             if (entry.isIntersecting) {
                 entry.target.style.opacity = '1';
                 entry.target.style.transform = 'translateY(0)';
+                observer.unobserve(entry.target);
             }
         });
     }, {
@@ -164,5 +114,9 @@ style.textContent = `
 `;
 document.head.appendChild(style);
 
-// Initialize when DOM is loaded
-document.addEventListener('DOMContentLoaded', loadProjects);
+// Initialize when DOM is loaded: load the cards if needed, then enhance them
+document.addEventListener('DOMContentLoaded', async () => {
+    await loadProjects();
+    observeProjectCards();
+    addTechStackHoverEffect();
+});
@@ -0,0 +1,202 @@
+import json
+import logging
+import queue
+import threading
+import urllib.request
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Alert states, in order of severity
+OK, WARNING, CRITICAL = 'ok', 'warning', 'critical'
+SEVERITY = {OK: 0, WARNING: 1, CRITICAL: 2}
+
+
+class Rule:
+    """Warning/critical thresholds on one metric, or on its rate of change.
+
+    A level only becomes the alert state after the metric stayed in it for
+    `sustain` seconds (debounce), and an active level is only left once
+    the value falls `hysteresis` below its threshold, so a metric hovering
+    around a threshold doesn't flap. With `rate=True` the thresholds apply
+    to the metric's change per second, smoothed over `smoothing` seconds.
+
+    All state is updated incrementally from the previous sample, so
+    evaluating a rule costs a few float operations.
+    """
+
+    def __init__(self, metric: str, warning: float = None, critical: float = None, sustain: float = 0.0,
+                 hysteresis: float = 0.0, rate: bool = False, smoothing: float = 10.0, name: str = None):
+        self.metric = metric
+        self.warning = warning
+        self.critical = critical
+        self.sustain = sustain
+        self.hysteresis = hysteresis
+        self.rate = rate
+        self.smoothing = smoothing
+        self.name = name or (f'{metric}_rate' if rate else metric)
+
+        self.state = OK
+        self.value = None
+        self._pending = None     # Level waiting for the sustain window
+        self._pending_since = None
+        self._last = None        # (timestamp, value) of the previous sample, for rates
+
+    def _level(self, value: float) -> str:
+        # Hysteresis: thresholds of levels at or below the current state are
+        # lowered, so leaving a level needs a clear drop below it
+        def reached(level, threshold):
+            if threshold is None:
+                return False
+            margin = self.hysteresis if SEVERITY[level] <= SEVERITY[self.state] else 0.0
+            return value >= threshold - margin
+
+        if reached(CRITICAL, self.critical):
+            return CRITICAL
+        if reached(WARNING, self.warning):
+            return WARNING
+        return OK
+
+    def _observe(self, timestamp: float, value: float) -> Optional[float]:
+        if not self.rate:
+            return value
+        last, self._last = self._last, (timestamp, value)
+        if last is None or timestamp <= last[0]:
+            return None
+        rate = (value - last[1]) / (timestamp - last[0])
+        if self.value is None:
+            return rate
+        # Exponential smoothing, weighted by the time since the last sample
+        alpha = min(1.0, (timestamp - last[0]) / self.smoothing) if self.smoothing > 0 else 1.0
+        return self.value + alpha * (rate - self.value)
+
+    def update(self, timestamp: float, value: Optional[float]) -> Optional[Dict]:
+        """Feed one sample; return an event dict if the alert state changed"""
+        if value is None or value != value:  # Missing or NaN
+            return None
+        observed = self._observe(timestamp, value)
+        if observed is None:
+            return None
+        self.value = observed
+
+        level = self._level(observed)
+        if level == self.state:
+            self._pending = None
+            return None
+        if level != self._pending:
+            self._pending, self._pending_since = level, timestamp
+        if timestamp - self._pending_since < self.sustain:
+            return None
+
+        previous, self.state, self._pending = self.state, level, None
+        return {
+            'rule': self.name,
+            'metric': self.metric,
+            'state': level,
+            'previous': previous,
+            'value': observed,
+            'time': timestamp
+        }
+
+
+class AlertEngine:
+    """Evaluate alert rules against every sample and dispatch state changes.
+
+    Rules are indexed by metric, so a sample only touches the rules of the
+    metrics it contains. Sinks are callables taking an event dict; a
+    failing sink is logged and never stops evaluation.
+    """
+
+    def __init__(self, rules: Iterable[Rule], sinks: Iterable[Callable[[Dict], None]] = ()):
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self._by_metric: Dict[str, List[Rule]] = defaultdict(list)
+        for rule in self.rules:
+            self._by_metric[rule.metric].append(rule)
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink: Callable[[Dict], None]):
+        self.sinks.append(sink)
+
+    def evaluate(self, timestamp: float, values: Dict[str, float]) -> List[Dict]:
+        """Update every rule with one sample and return the events it caused"""
+        events = []
+        with self._lock:
+            for metric, value in values.items():
+                for rule in self._by_metric.get(metric, ()):
+                    event = rule.update(timestamp, value)
+                    if event is not None:
+                        events.append(event)
+
+        for event in events:
+            for sink in self.sinks:
+                try:
+                    sink(event)
+                except Exception as e:
+                    logging.error(f"Error in alert sink {getattr(sink, '__name__', sink)}: {e}")
+        return events
+
+    def states(self) -> Dict[str, Dict]:
+        """Current state and last evaluated value of every rule"""
+        with self._lock:
+            return {rule.name: {'metric': rule.metric, 'state': rule.state, 'value': rule.value}
+                    for rule in self.rules}
+
+
+def format_event(event: Dict) -> str:
+    return (f"Alert {event['rule']}: {event['previous']} -> {event['state']} "
+            f"({event['metric']} = {event['value']:.2f})")
+
+
+class LogSink:
+    """Log alert events; critical ones as errors"""
+
+    def __call__(self, event: Dict):
+        if event['state'] == CRITICAL:
+            logging.error(format_event(event))
+        else:
+            logging.warning(format_event(event))
+
+
+class FileSink:
+    """Append alert events to a file as JSON lines"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict):
+        line = json.dumps(event, separators=(',', ':')) + '\n'
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line)
+
+
+class WebhookSink:
+    """POST alert events as JSON to a URL from a background thread.
+
+    The collector only queues the event; delivery (and its timeouts) never
+    delays sampling. When the queue is full, new events are dropped.
+    """
+
+    def __init__(self, url: str, timeout: float = 5.0, max_queue: int = 1000):
+        self.url = url
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='alert-webhook', daemon=True)
+        self._thread.start()
+
+    def __call__(self, event: Dict):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logging.warning(f"Alert webhook queue full, dropping {event['rule']} event")
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            request = urllib.request.Request(self.url, data=json.dumps(event).encode(), method='POST')
+            request.add_header('Content-Type', 'application/json')
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+            except Exception as e:
+                logging.warning(f"Sending alert {event['rule']} to {self.url} failed: {e}")
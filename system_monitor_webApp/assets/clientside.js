@@ -0,0 +1,48 @@
+// Clientside callbacks: pure UI state that never needs a server round trip
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    monitor: {
+        // Swap the visible page, highlight the active navigation button and
+        // tell the server which page is shown; the Monitor Health page has
+        // no button and opens from /#health
+        toggle_pages: function(resClicks, netClicks, breakdownClicks, hash, navStyles) {
+            const pages = {
+                'nav-resources': 'resources',
+                'nav-network': 'network',
+                'nav-breakdown': 'breakdown'
+            };
+            const triggered = dash_clientside.callback_context.triggered
+                .map(t => t.prop_id.split('.')[0]);
+            const clicked = triggered.find(id => id in pages);
+            let page = 'resources';
+            if (clicked) {
+                page = pages[clicked];
+            } else if (hash === '#health') {
+                page = 'health';
+            }
+            const display = name => ({'display': page === name ? 'block' : 'none'});
+            return [
+                ...Object.values(pages).map(name => page === name ? navStyles.active : navStyles.default),
+                display('resources'),
+                display('network'),
+                display('breakdown'),
+                display('health'),
+                page
+            ];
+        },
+
+        // Width of the widest visible graph, rounded to 100 px so small
+        // layout changes don't cause redraws
+        plot_width: function(n, current) {
+            const widths = Array.from(document.querySelectorAll('.dash-graph'))
+                .map(graph => graph.offsetWidth);
+            const width = Math.max(0, ...widths) || window.innerWidth;
+            const rounded = Math.max(100, Math.round(width / 100) * 100);
+            return rounded === current ? dash_clientside.no_update : rounded;
+        },
+
+        // Convert the refresh slider from seconds to interval milliseconds
+        update_interval: function(value) {
+            return value * 1000;
+        }
+    }
+});
@@ -0,0 +1,322 @@
+"""Benchmarks for the monitor's collection and callback paths.
+
+Times the psutil collection functions and the Dash callbacks (dispatched
+through Flask exactly like a browser request), and reports p50/p99
+latency, peak allocations and the serialized response size for several
+history lengths and process counts.
+
+    python benchmarks/run_benchmarks.py                       # real psutil
+    python benchmarks/run_benchmarks.py --mock --processes 200 2000
+    python benchmarks/run_benchmarks.py --mock --json baseline.json
+    python benchmarks/run_benchmarks.py --mock --compare baseline.json
+"""
+import argparse
+import contextlib
+import importlib
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Callable, Dict, List
+from unittest import mock
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import psutil  # noqa: E402
+
+HISTORY_FIELDS = ['ram', 'cpu', 'disk', 'network_sent', 'network_recv', 'temp']
+
+
+class FakeProcess:
+    """Stand-in for psutil.Process with deterministic readings"""
+
+    def __init__(self, pid: int = 0):
+        self.pid = pid
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+    def memory_info(self):
+        return namedtuple('pmem', 'rss')(50 * 1024 * 1024)
+
+    def num_threads(self) -> int:
+        return 4
+
+    def create_time(self) -> float:
+        return 1_700_000_000.0 + self.pid
+
+    def cpu_percent(self, interval=None) -> float:
+        return (self.pid * 7919) % 1000 / 10
+
+    def memory_percent(self) -> float:
+        return (self.pid * 104729) % 1000 / 100
+
+    def name(self) -> str:
+        return f'process-{self.pid}'
+
+
+def mock_psutil(processes: int):
+    """Patch psutil with cheap, deterministic fakes simulating `processes` processes"""
+    nic = namedtuple('snetio', 'bytes_sent bytes_recv')
+    counter = {'n': 0}
+
+    def net_io_counters(pernic=False):
+        counter['n'] += 1
+        return {'eth0': nic(counter['n'] * 125_000, counter['n'] * 250_000), 'lo': nic(0, 0)}
+
+    disk = namedtuple('sdiskio', 'read_bytes write_bytes')
+    partition = namedtuple('sdiskpart', 'mountpoint fstype')
+
+    def disk_io_counters(perdisk=False):
+        return {'sda': disk(counter['n'] * 4096, counter['n'] * 8192)}
+
+    return mock.patch.multiple(
+        psutil,
+        virtual_memory=lambda: mock.Mock(percent=42.0),
+        cpu_percent=lambda interval=None, percpu=False: [12.5] * 8 if percpu else 12.5,
+        cpu_count=lambda logical=True: 8,
+        disk_partitions=lambda all=False: [partition('/', 'ext4')],
+        disk_io_counters=disk_io_counters,
+        disk_usage=lambda path: mock.Mock(percent=63.0),
+        net_io_counters=net_io_counters,
+        sensors_temperatures=lambda: {'coretemp': [mock.Mock(current=55.0)]},
+        pids=lambda: list(range(1, processes + 1)),
+        Process=FakeProcess
+    )
+
+
+def measure(fn: Callable, repeat: int) -> Dict:
+    """Time `fn` `repeat` times, then measure its peak allocation"""
+    fn()  # Warm up caches and imports
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'p50_ms': statistics.median(timings),
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'peak_kib': peak / 1024,
+        'bytes': len(result) if isinstance(result, (bytes, str)) else None
+    }
+
+
+def load_monitor(mode: str):
+    """Import system_monitor in the given mode without starting its collector"""
+    sys.modules.pop('system_monitor', None)
+    # Imported (not run), the module takes its options from $MONITOR_ARGS
+    previous = os.environ.get('MONITOR_ARGS')
+    os.environ['MONITOR_ARGS'] = mode
+    try:
+        monitor = importlib.import_module('system_monitor')
+    finally:
+        if previous is None:
+            del os.environ['MONITOR_ARGS']
+        else:
+            os.environ['MONITOR_ARGS'] = previous
+    # Samples are taken explicitly below; a background thread would skew timings
+    monitor.collector.start = lambda: None
+    return monitor
+
+
+def fill_history(monitor, seconds: int):
+    """Replace the monitor's history with `seconds` of synthetic 1 Hz samples"""
+    end = time.time()
+    times = np.arange(end - seconds, end, 1.0)
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 100, size=(len(times), len(HISTORY_FIELDS)))
+    monitor.history.load(times, values)
+    return float(times[-1])
+
+
+def callback_request(monitor, output_id: str, inputs: List[Dict], state: List[Dict], changed: List[str]) -> Callable:
+    """Build a function that dispatches one callback through Flask"""
+    client = monitor.app.server.test_client()
+    client.get('/')  # Initializes Dash's callback registry
+    outputs = [
+        {'id': item.split('.')[0], 'property': item.split('.')[1]}
+        for item in output_id.strip('.').split('...')
+    ]
+    body = {'output': output_id, 'outputs': outputs, 'inputs': inputs, 'state': state,
+            'changedPropIds': changed}
+
+    def call():
+        response = client.post('/_dash-update-component', json=body)
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f'{output_id} failed with {response.status_code}')
+        return response.get_data()
+    return call
+
+
+def bench_collection(monitor, repeat: int, processes: int, results: List[Dict]):
+    results.append({'name': 'get_system_stats', 'params': {}, **measure(monitor.get_system_stats, repeat)})
+    results.append({'name': 'get_network_speed', 'params': {}, **measure(monitor.get_network_speed, repeat)})
+    results.append({'name': 'get_cpu_temperature', 'params': {}, **measure(monitor.get_cpu_temperature, repeat)})
+    network = monitor.get_network_speed()
+    results.append({'name': 'get_breakdown', 'params': {},
+                    **measure(lambda: monitor.get_breakdown(network), repeat)})
+
+    # Measure sampling with the process table open
+    monitor.process_demand.touch()
+
+    # A scanner without rate limiting measures the cost of a full scan
+    scanner = monitor.ProcessScanner(min_interval=0)
+    scanner.top()
+    results.append({'name': 'get_top_processes (scan)', 'params': {'processes': processes},
+                    **measure(scanner.top, repeat)})
+    results.append({'name': 'get_top_processes (cached)', 'params': {'processes': processes},
+                    **measure(monitor.get_top_processes, repeat)})
+    results.append({'name': 'sample_metrics', 'params': {'processes': processes},
+                    **measure(monitor.sample_metrics, repeat)})
+
+
+# Plot width the benchmarked browser reports, in pixels
+PLOT_WIDTH = 1200
+
+# Graph callbacks per mode: (name, graphs, cursor store, zoom store, rendered-values store,
+# page the callback renders)
+CALLBACKS = {
+    'one': [('update_resources', ['combined-graph'], 'graph-cursor', 'graph-zoom', 'resources-rendered', 'resources'),
+            ('update_network', ['network-graph'], 'network-cursor', 'network-zoom', 'network-rendered', 'network')],
+    'multiple': [('update_separate_graphs', ['ram-graph', 'cpu-graph', 'disk-graph'], 'graph-cursor', 'graph-zoom',
+                  None, None)]
+}
+
+# Length of the range a zoom benchmark selects, in seconds
+ZOOM_SECONDS = 600
+
+
+def bench_callbacks(monitor, mode: str, repeat: int, history_lengths: List[int], results: List[Dict]):
+    tick = 5  # Seconds between interval ticks, the dashboard default
+
+    for name, graphs, store, zoom_store, rendered_store, page in CALLBACKS[mode]:
+        output_id = next(key for key in monitor.app.callback_map if f'{store}.data' in key)
+        for seconds in history_lengths:
+            last = fill_history(monitor, seconds)
+            monitor.process_demand.touch()
+            monitor.collector.collect()
+
+            def callback_inputs(relayout=None):
+                items = [{'id': 'interval-component', 'property': 'n_intervals', 'value': 1},
+                         {'id': 'history-range', 'property': 'value', 'value': seconds}]
+                if page is not None:
+                    items.append({'id': 'active-page', 'property': 'data', 'value': page})
+                items.append({'id': 'plot-width', 'property': 'data', 'value': PLOT_WIDTH})
+                items += [{'id': graph, 'property': 'relayoutData', 'value': relayout if i == 0 else None}
+                          for i, graph in enumerate(graphs)]
+                return items
+
+            def states(cursor, rendered=None):
+                items = [{'id': store, 'property': 'data', 'value': cursor},
+                         {'id': zoom_store, 'property': 'data', 'value': None}]
+                if rendered_store is not None:
+                    items.append({'id': rendered_store, 'property': 'data', 'value': rendered})
+                return items
+
+            inputs = callback_inputs()
+            full = callback_request(monitor, output_id, inputs, states(None), ['history-range.value'])
+            results.append({'name': f'{name} (full figure)', 'params': {'history_s': seconds},
+                            **measure(full, repeat)})
+
+            # Ticks see the cursor and values the full render left on the client
+            response = json.loads(full())['response']
+            rendered = response[rendered_store]['data'] if rendered_store is not None else None
+            cursor = dict(response[store]['data'], time=last - monitor.history.resolution_for(seconds) * tick)
+            stream = callback_request(monitor, output_id, inputs, states(cursor, rendered),
+                                      ['interval-component.n_intervals'])
+            results.append({'name': f'{name} (stream tick)', 'params': {'history_s': seconds},
+                            **measure(stream, repeat)})
+
+            # Zooming into the oldest part of the window loads just that range
+            start = last - seconds
+            relayout = {'xaxis.range[0]': monitor.axis_times([start])[0],
+                        'xaxis.range[1]': monitor.axis_times([start + ZOOM_SECONDS])[0]}
+            zoom = callback_request(monitor, output_id, callback_inputs(relayout), states(cursor, rendered),
+                                    [f'{graphs[0]}.relayoutData'])
+            results.append({'name': f'{name} (zoom)', 'params': {'history_s': seconds},
+                            **measure(zoom, repeat)})
+
+
+def print_results(results: List[Dict]):
+    header = f"{'benchmark':<36} {'params':<22} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>10} {'bytes':>10}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        params = ' '.join(f'{k}={v}' for k, v in r['params'].items())
+        size = '' if r['bytes'] is None else str(r['bytes'])
+        print(f"{r['name']:<36} {params:<22} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} "
+              f"{r['peak_kib']:>10.1f} {size:>10}")
+
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> int:
+    """Print regressions against a saved run and return how many there were"""
+    with open(baseline_path) as f:
+        baseline = {(r['name'], json.dumps(r['params'], sort_keys=True)): r for r in json.load(f)}
+
+    regressions = 0
+    for r in results:
+        old = baseline.get((r['name'], json.dumps(r['params'], sort_keys=True)))
+        if old is None:
+            continue
+        for metric in ('p50_ms', 'peak_kib', 'bytes'):
+            if old.get(metric) and r.get(metric) and r[metric] > old[metric] * tolerance:
+                print(f"REGRESSION {r['name']} {r['params']}: {metric} "
+                      f"{old[metric]:.3f} -> {r[metric]:.3f}")
+                regressions += 1
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the system monitor')
+    parser.add_argument('--mock', action='store_true', help='Use deterministic fake psutil data')
+    parser.add_argument('--processes', type=int, nargs='+', default=[200, 2000],
+                        help='Simulated process counts (with --mock)')
+    parser.add_argument('--history', type=int, nargs='+', default=[300, 3600, 24 * 3600, 30 * 24 * 3600],
+                        help='History lengths in seconds')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed runs per benchmark')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--compare', help='Compare against results written with --json')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='Allowed slowdown factor before --compare reports a regression')
+    args = parser.parse_args()
+    # The monitor logs every sample at INFO, which would dominate the timings
+    logging.disable(logging.INFO)
+
+    results = []
+    process_counts = args.processes if args.mock else [len(psutil.pids())]
+    for processes in process_counts:
+        patcher = mock_psutil(processes) if args.mock else mock.patch.dict({})
+        with patcher:
+            monitor = load_monitor('one')
+            bench_collection(monitor, args.repeat, processes, results)
+
+    with mock_psutil(process_counts[0]) if args.mock else mock.patch.dict({}):
+        for mode in ('one', 'multiple'):
+            monitor = load_monitor(mode)
+            bench_callbacks(monitor, mode, args.repeat, args.history, results)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
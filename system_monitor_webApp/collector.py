@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+class MetricsCollector:
+    """Sample metrics on a background thread into a shared ring buffer.
+
+    Dash callbacks only read the most recent snapshot, so they never block
+    on psutil no matter how many dashboards are open.
+    """
+
+    def __init__(self, sample_fn: Callable[[], Dict], interval: float = 1.0, size: int = 600):
+        self.sample_fn = sample_fn
+        self.interval = interval
+        self._buffer = deque(maxlen=size)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """Register a callback invoked once with every new sample"""
+        self._subscribers.append(callback)
+
+    def start(self):
+        """Start the sampling thread (no-op if it is already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-collector', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the sampling thread and wait for it to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self.collect()
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # Sampling overran the interval, resync instead of bursting
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def collect(self) -> Optional[Dict]:
+        """Take one sample and append it to the ring buffer"""
+        try:
+            sample = self.sample_fn()
+        except Exception as e:
+            logging.error(f"Error collecting metrics: {e}")
+            return None
+
+        sample['timestamp'] = time.time()
+        with self._lock:
+            self._buffer.append(sample)
+
+        for callback in self._subscribers:
+            try:
+                callback(sample)
+            except Exception as e:
+                logging.error(f"Error in metrics subscriber {getattr(callback, '__name__', callback)}: {e}")
+        return sample
+
+    def latest(self) -> Optional[Dict]:
+        """Return the most recent snapshot, or None before the first sample"""
+        with self._lock:
+            return self._buffer[-1] if self._buffer else None
+
+    def snapshots(self, n: int = None) -> List[Dict]:
+        """Return up to the last n snapshots, oldest first"""
+        with self._lock:
+            items = list(self._buffer)
+        return items if n is None else items[-n:]
+
+
+class Demand:
+    """Track whether anyone asked for an optional metric recently.
+
+    Consumers call touch() whenever they need the metric; the collector
+    only gathers it while active(), i.e. within `ttl` seconds of the last
+    touch, so expensive metrics nobody is looking at cost nothing.
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._last = None
+
+    def touch(self):
+        self._last = time.monotonic()
+
+    def active(self) -> bool:
+        return self._last is not None and time.monotonic() - self._last < self.ttl
@@ -0,0 +1,31 @@
+import numpy as np
+
+
+def minmax_indices(values: np.ndarray, buckets: int) -> np.ndarray:
+    """Row indices of a min/max envelope of `values` in at most `buckets` buckets.
+
+    `values` has one column per series. Rows are split into equal buckets
+    and, for every column, the rows holding the bucket's minimum and
+    maximum are kept, plus the first and last row. Every spike therefore
+    survives, all series share the same rows (and x values), and the
+    result never exceeds 2 * buckets * columns + 2 rows, however long the
+    input is.
+    """
+    n = len(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    if n <= 2 * buckets:
+        return np.arange(n)
+
+    size = -(-n // buckets)
+    count = -(-n // size)
+    padded = np.full((count * size, values.shape[1]), np.nan)
+    padded[:n] = values
+    padded = padded.reshape(count, size, values.shape[1])
+
+    # NaN never wins: gaps only show up if a whole bucket is missing
+    lows = np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    offsets = (np.arange(count) * size)[:, None]
+    indices = np.concatenate([(lows + offsets).ravel(), (highs + offsets).ravel(), [0, n - 1]])
+    return np.unique(indices[indices < n])
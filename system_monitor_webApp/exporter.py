@@ -0,0 +1,60 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# A metric family: (name, help, [(labels, value), ...])
+Family = Tuple[str, str, List[Tuple[Dict[str, str], Optional[float]]]]
+
+
+def escape_label(value) -> str:
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_families(families: List[Family]) -> str:
+    """Render gauge families in OpenMetrics text format.
+
+    Only gauges without UNIT lines are emitted, so the same text is also a
+    valid Prometheus 0.0.4 exposition (which treats `# EOF` as a comment).
+    """
+    lines = []
+    for name, help_text, samples in families:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in samples:
+            if labels:
+                label_text = ','.join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+                lines.append(f'{name}{{{label_text}}} {value}')
+            else:
+                lines.append(f'{name} {value}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter:
+    """Serve the collector's latest snapshot as OpenMetrics text.
+
+    The rendered text is cached per sample, so any number of scrapes within
+    one sampling tick cost a dictionary lookup and never call psutil.
+    """
+
+    def __init__(self, families_fn):
+        self.families_fn = families_fn
+        self._lock = threading.Lock()
+        self._sample = None
+        self._text = render_families([])
+
+    def render(self, sample: Optional[Dict]) -> str:
+        """Return the exposition text for a sample, rendering it at most once"""
+        if sample is None:
+            return self._text
+        with self._lock:
+            if sample is not self._sample:
+                self._text = render_families(self.families_fn(sample))
+                self._sample = sample
+            return self._text
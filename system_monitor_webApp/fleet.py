@@ -0,0 +1,199 @@
+import gzip
+import json
+import logging
+import math
+import threading
+import urllib.request
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from history import MetricHistory
+
+# Upper bound of a decompressed batch, protects the aggregator from gzip bombs
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+
+
+def encode_batch(host: str, fields: Tuple[str, ...], samples: List[List[float]]) -> bytes:
+    """Encode a batch of samples as gzip-compressed compact JSON.
+
+    Samples are rows of [timestamp, field 1, ..., field n], so field names
+    are sent once per batch rather than once per value.
+    """
+    body = json.dumps({'host': host, 'fields': list(fields), 'samples': samples},
+                      separators=(',', ':'))
+    return gzip.compress(body.encode(), compresslevel=6)
+
+
+def decode_batch(data: bytes, compressed: bool = True) -> Dict:
+    """Decode a batch produced by encode_batch, refusing oversized bodies"""
+    if compressed:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data = decompressor.decompress(data, MAX_BATCH_BYTES)
+        if decompressor.unconsumed_tail:
+            raise ValueError('Batch exceeds the maximum decompressed size')
+    batch = json.loads(data)
+    if not isinstance(batch.get('host'), str) or not isinstance(batch.get('samples'), list):
+        raise ValueError('Malformed batch')
+    return batch
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class FleetShipper:
+    """Headless agent side: buffer samples and ship them in batches.
+
+    Samples are queued by the collector and POSTed to the aggregator every
+    `batch_interval` seconds. If the aggregator is unreachable the batch is
+    kept and retried, up to `max_buffer` samples (oldest are dropped).
+    """
+
+    def __init__(self, url: str, host: str, fields: Iterable[str], batch_interval: float = 10.0,
+                 max_buffer: int = 3600, token: str = None, timeout: float = 5.0):
+        self.url = url.rstrip('/') + '/ingest'
+        self.host = host
+        self.fields = tuple(fields)
+        self.batch_interval = batch_interval
+        self.token = token
+        self.timeout = timeout
+        self._buffer = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add(self, timestamp: float, values: Dict[str, float]):
+        """Queue one sample (collector subscriber)"""
+        row = [round(timestamp, 3)] + [values.get(name) for name in self.fields]
+        with self._lock:
+            self._buffer.append(row)
+
+    def ship(self) -> bool:
+        """Send everything buffered so far; keep it for a retry on failure"""
+        with self._lock:
+            samples = list(self._buffer)
+        if not samples:
+            return True
+
+        request = urllib.request.Request(self.url, data=encode_batch(self.host, self.fields, samples),
+                                         method='POST')
+        request.add_header('Content-Type', 'application/json')
+        request.add_header('Content-Encoding', 'gzip')
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except Exception as e:
+            logging.warning(f"Shipping {len(samples)} samples to {self.url} failed: {e}")
+            return False
+
+        with self._lock:
+            # Only drop what was sent; samples added meanwhile stay queued
+            for _ in range(min(len(samples), len(self._buffer))):
+                self._buffer.popleft()
+        return True
+
+    def run(self):
+        """Ship batches until stop() is called (blocking)"""
+        while not self._stop.wait(self.batch_interval):
+            self.ship()
+        self.ship()
+
+    def stop(self):
+        self._stop.set()
+
+
+class FleetStore:
+    """Aggregator side: bounded per-host histories fed by agent batches.
+
+    Each host gets a small single-tier MetricHistory, and at most
+    `max_hosts` hosts are kept; the host that reported least recently is
+    evicted first, so memory stays bounded with hundreds of agents.
+    """
+
+    def __init__(self, fields: Iterable[str], resolution: float = 1.0, retention: float = 900,
+                 max_hosts: int = 1000):
+        self.fields = tuple(fields)
+        self.tiers = ((resolution, retention),)
+        self.max_hosts = max_hosts
+        self._hosts: 'OrderedDict[str, MetricHistory]' = OrderedDict()
+        self._latest: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def parse_rows(self, batch: Dict) -> List[Tuple[float, Dict[str, float]]]:
+        """Validate every sample of a decoded batch into sorted (timestamp, values).
+
+        Raises ValueError on the first malformed row, so a bad batch is
+        rejected as a whole instead of being half stored.
+        """
+        names = batch.get('fields', [])
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise ValueError('Malformed field names')
+        index = {name: i for i, name in enumerate(names, start=1) if name in self.fields}
+
+        rows = []
+        for row in batch['samples']:
+            if not isinstance(row, list) or not row or not is_number(row[0]) or not math.isfinite(row[0]):
+                raise ValueError(f'Malformed sample {str(row)[:64]}')
+            values = {name: row[i] for name, i in index.items() if i < len(row)}
+            if not all(value is None or is_number(value) for value in values.values()):
+                raise ValueError(f'Malformed sample values {str(row)[:64]}')
+            rows.append((float(row[0]), values))
+        rows.sort(key=lambda row: row[0])
+        return rows
+
+    def ingest(self, batch: Dict) -> int:
+        """Store a decoded batch and return the number of samples accepted"""
+        host = batch['host'][:128]
+        rows = self.parse_rows(batch)
+        if not rows:
+            return 0
+
+        with self._lock:
+            history = self._hosts.pop(host, None)
+            if history is None:
+                history = MetricHistory(self.fields, tiers=self.tiers)
+                while len(self._hosts) >= self.max_hosts:
+                    evicted, _ = self._hosts.popitem(last=False)
+                    self._latest.pop(evicted, None)
+            # Most recently reporting host goes to the end of the LRU order
+            self._hosts[host] = history
+
+            latest = self._latest.get(host)
+            accepted = 0
+            for timestamp, values in rows:
+                if latest is not None and timestamp <= latest['time']:
+                    continue  # Duplicate from a retried batch
+                history.append(timestamp, values)
+                latest = {'time': timestamp, **values}
+                accepted += 1
+            if latest is not None:
+                self._latest[host] = latest
+        return accepted
+
+    def hosts(self) -> List[str]:
+        with self._lock:
+            return sorted(self._hosts)
+
+    def latest(self) -> Dict[str, Dict]:
+        """Latest values of every host"""
+        with self._lock:
+            return dict(self._latest)
+
+    def top(self, n: int = 10, field: str = 'cpu') -> List[Tuple[str, Dict]]:
+        """Hosts with the highest latest value of `field`"""
+        latest = self.latest()
+        ranked = [(host, values) for host, values in latest.items() if values.get(field) is not None]
+        ranked.sort(key=lambda item: item[1][field], reverse=True)
+        return ranked[:n]
+
+    def window(self, host: str, seconds: float) -> Optional[Dict]:
+        """Columns of the last `seconds` of a host's history"""
+        with self._lock:
+            history = self._hosts.get(host)
+            latest = self._latest.get(host)
+        if history is None or latest is None:
+            return None
+        # Agents' clocks may differ from ours, so window by their last sample
+        return history.query(seconds=seconds, end=latest['time'])
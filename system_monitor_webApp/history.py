@@ -0,0 +1,228 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (resolution, retention) in seconds: 1s raw for 10 minutes, 10s averages
+# for 24 hours and 1 minute averages for 30 days
+DEFAULT_TIERS = ((1, 600), (10, 24 * 3600), (60, 30 * 24 * 3600))
+
+
+class Tier:
+    """Fixed-size columnar ring buffer holding one resolution of history.
+
+    Rows are epoch-second timestamps plus one column per field (float64 by
+    default), so memory use is fixed by the capacity regardless of content.
+    Tiers coarser than the sampling interval average samples into buckets of
+    `resolution` seconds and only store a row once its bucket is complete.
+    """
+
+    def __init__(self, resolution: float, retention: float, n_fields: int, raw: bool = False,
+                 dtype=np.float64):
+        self.resolution = resolution
+        self.retention = retention
+        self.capacity = max(1, int(retention // resolution))
+        self.raw = raw
+        self.times = np.full(self.capacity, np.nan)
+        self.values = np.full((self.capacity, n_fields), np.nan, dtype=dtype)
+        self.head = 0
+        self.count = 0
+
+        # Running sum of the bucket currently being filled
+        self._bucket = None
+        self._sum = np.zeros(n_fields)
+        self._n = np.zeros(n_fields)
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.values.nbytes
+
+    def _push(self, timestamp: float, row: np.ndarray):
+        self.times[self.head] = timestamp
+        self.values[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def add(self, timestamp: float, row: np.ndarray):
+        """Add one sample, storing it directly or folding it into a bucket"""
+        if self.raw:
+            self._push(timestamp, row)
+            return
+
+        bucket = timestamp - timestamp % self.resolution
+        if self._bucket is not None and bucket != self._bucket:
+            self._flush()
+        self._bucket = bucket
+
+        present = ~np.isnan(row)
+        self._sum[present] += row[present]
+        self._n[present] += 1
+
+    def load(self, times: np.ndarray, values: np.ndarray):
+        """Bulk-load chronologically sorted rows into an empty tier.
+
+        Downsampled tiers aggregate the rows with vectorized bucket sums; the
+        last bucket stays open so live samples keep folding into it.
+        """
+        if not len(times):
+            return
+        if not self.raw:
+            buckets = times - times % self.resolution
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            present = ~np.isnan(values)
+            sums = np.add.reduceat(np.where(present, values, 0.0), starts)
+            counts = np.add.reduceat(present.astype(float), starts)
+
+            # Keep the newest bucket open as the running sum
+            self._bucket = buckets[starts[-1]]
+            self._sum[:] = sums[-1]
+            self._n[:] = counts[-1]
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = sums[:-1] / counts[:-1]
+            times = buckets[starts[:-1]]
+
+        times, values = times[-self.capacity:], values[-self.capacity:]
+        n = len(times)
+        self.times[:n] = times
+        self.values[:n] = values
+        self.head = n % self.capacity
+        self.count = n
+
+    def _flush(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            row = self._sum / self._n
+        self._push(self._bucket, row)
+        self._sum[:] = 0
+        self._n[:] = 0
+
+    def oldest(self) -> Optional[float]:
+        """Timestamp of the oldest stored row"""
+        if not self.count:
+            return None
+        return self.times[self.head if self.count == self.capacity else 0]
+
+    def _segments(self):
+        # The ring in chronological order as one or two contiguous slices
+        if self.count < self.capacity:
+            return [slice(0, self.count)]
+        return [slice(self.head, self.capacity), slice(0, self.head)]
+
+    def between(self, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Return copies of (times, values) with start <= time <= end.
+
+        Only the matching rows are copied, so small incremental reads stay
+        cheap even on tiers holding tens of thousands of rows.
+        """
+        times, values = [], []
+        for segment in self._segments():
+            seg_times = self.times[segment]
+            lo = np.searchsorted(seg_times, start, side='left')
+            hi = np.searchsorted(seg_times, end, side='right')
+            if lo < hi:
+                times.append(seg_times[lo:hi])
+                values.append(self.values[segment][lo:hi])
+        if not times:
+            return np.empty(0), np.empty((0, self.values.shape[1]))
+        return np.concatenate(times), np.concatenate(values)
+
+
+class MetricHistory:
+    """Server-owned, memory-bounded time series with downsampling tiers.
+
+    The collector appends exactly once per sampling tick and every tier is
+    updated incrementally; clients query any window and get it from the
+    finest tier that still covers it.
+    """
+
+    def __init__(self, fields: Iterable[str], tiers: Sequence[Tuple[float, float]] = DEFAULT_TIERS,
+                 dtype=np.float64):
+        self.fields = tuple(fields)
+        self.dtype = dtype
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self.tiers = [
+            Tier(resolution, retention, len(self.fields), raw=(i == 0), dtype=dtype)
+            for i, (resolution, retention) in enumerate(tiers)
+        ]
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by all tiers in bytes"""
+        return sum(tier.nbytes for tier in self.tiers)
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        """Append one sample; fields missing from values are stored as NaN"""
+        self.append_row(timestamp, [
+            np.nan if values.get(name) is None else values[name]
+            for name in self.fields
+        ])
+
+    def append_row(self, timestamp: float, row: Sequence[float]):
+        """Append one sample given as values in `self.fields` order"""
+        row = np.asarray(row, dtype=float)
+        with self._lock:
+            for tier in self.tiers:
+                tier.add(timestamp, row)
+
+    def load(self, times: np.ndarray, values: np.ndarray):
+        """Replace the history with stored rows, e.g. from a RingFile.
+
+        `values` has one column per field in `self.fields` order.
+        """
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[order]
+        with self._lock:
+            for i, tier in enumerate(self.tiers):
+                self.tiers[i] = Tier(tier.resolution, tier.retention, len(self.fields), raw=tier.raw,
+                                     dtype=self.dtype)
+                self.tiers[i].load(times, values)
+
+    def select_tier(self, start: float, end: float, max_points: int = None) -> Tier:
+        """Pick the finest tier that covers start and fits within max_points"""
+        for tier in self.tiers:
+            if max_points is not None and (end - start) / tier.resolution > max_points:
+                continue
+            if tier.count == tier.capacity and tier.oldest() > start:
+                continue
+            return tier
+        return self.tiers[-1]
+
+    def resolution_for(self, seconds: float) -> float:
+        """Resolution of the tier that serves a window of the last `seconds`"""
+        end = time.time()
+        with self._lock:
+            return self.select_tier(end - seconds, end).resolution
+
+    def query(self, seconds: float = None, start: float = None, end: float = None,
+              max_points: int = None, since: float = None) -> Dict[str, np.ndarray]:
+        """Return columns for [start, end] or for the last `seconds` seconds.
+
+        The result holds a 'time' column of epoch seconds plus one array
+        per field, taken from the finest tier that can serve the window.
+        Passing `since` keeps the tier choice of the full window but only
+        returns rows newer than that timestamp, for incremental updates.
+        """
+        times, values = self.query_matrix(seconds, start, end, max_points, since)
+        columns = {'time': times}
+        for name, i in self._index.items():
+            columns[name] = values[:, i]
+        return columns
+
+    def query_matrix(self, seconds: float = None, start: float = None, end: float = None,
+                     max_points: int = None, since: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Like query(), but return (times, values) with one column per field"""
+        end = time.time() if end is None else end
+        if start is None:
+            start = end - (seconds if seconds is not None else self.tiers[0].retention)
+
+        with self._lock:
+            tier = self.select_tier(start, end, max_points)
+            if since is not None:
+                start = max(start, np.nextafter(since, np.inf))
+            return tier.between(start, end)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.tiers[0].count
@@ -0,0 +1,178 @@
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+import psutil
+from flask import has_request_context, request
+
+
+class TimerStats:
+    """Call count and durations of one instrumented function"""
+
+    def __init__(self, window: int = 512):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, seconds: float, failed: bool = False):
+        self.calls += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def summary(self) -> Dict:
+        """Durations in milliseconds; percentiles cover the recent window"""
+        recent = sorted(self.recent)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'mean_ms': self.total / self.calls * 1000 if self.calls else 0.0,
+            'p50_ms': recent[len(recent) // 2] * 1000 if recent else 0.0,
+            'p99_ms': recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000 if recent else 0.0,
+            'max_ms': self.max * 1000
+        }
+
+
+class Instrumentation:
+    """Hot-path timers, per-client callback counters and on-demand profiling.
+
+    Wrap functions with `timed()`; calls made while serving a request are
+    also counted per client address (at most `max_clients` are tracked,
+    least recently seen first out). Recording a call is a few dictionary
+    operations under a lock, so it is cheap enough for every tick.
+    """
+
+    def __init__(self, max_clients: int = 256):
+        self.max_clients = max_clients
+        self._timers: Dict[str, TimerStats] = {}
+        self._clients: 'OrderedDict[str, Dict[str, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._process = psutil.Process()
+        self._process.cpu_percent(interval=None)  # Prime the counter
+
+        # On-demand profiling state
+        self._profile_lock = threading.Lock()
+        self._profile_until = 0.0
+        self._profile_stats: Optional[pstats.Stats] = None
+        self.profile_report: Optional[str] = None
+
+    def timed(self, name: str = None) -> Callable:
+        """Decorator recording the duration of every call under `name`"""
+        def decorator(fn):
+            label = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                client = request.remote_addr if has_request_context() else None
+                start = time.perf_counter()
+                failed = True
+                try:
+                    result = self._call(fn, args, kwargs)
+                    failed = False
+                    return result
+                finally:
+                    self.record(label, time.perf_counter() - start, client, failed)
+            return wrapper
+        return decorator
+
+    def record(self, name: str, seconds: float, client: str = None, failed: bool = False):
+        """Record one call of `name`, made on behalf of `client` if known"""
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = TimerStats()
+            timer.add(seconds, failed)
+
+            if client is not None:
+                counts = self._clients.pop(client, None)
+                if counts is None:
+                    counts = {}
+                    while len(self._clients) >= self.max_clients:
+                        self._clients.popitem(last=False)
+                self._clients[client] = counts
+                counts[name] = counts.get(name, 0) + 1
+
+    def timers(self) -> Dict[str, Dict]:
+        """Summaries of every timer, keyed by name"""
+        with self._lock:
+            return {name: timer.summary() for name, timer in sorted(self._timers.items())}
+
+    def clients(self) -> Dict[str, Dict[str, int]]:
+        """Callback invocations per client address"""
+        with self._lock:
+            return {client: dict(counts) for client, counts in self._clients.items()}
+
+    def process_usage(self) -> Dict:
+        """The monitor's own resource usage (CPU in percent of one core)"""
+        try:
+            with self._process.oneshot():
+                return {
+                    'rss': self._process.memory_info().rss,
+                    'cpu_percent': self._process.cpu_percent(interval=None),
+                    'threads': self._process.num_threads()
+                }
+        except psutil.Error:
+            return {}
+
+    def start_profile(self, seconds: float = 10.0):
+        """Profile instrumented calls for the next `seconds` seconds"""
+        with self._lock:
+            self._profile_stats = None
+            self.profile_report = None
+            self._profile_until = time.monotonic() + seconds
+
+    @property
+    def profiling(self) -> bool:
+        return time.monotonic() < self._profile_until
+
+    def _call(self, fn, args, kwargs):
+        # Only one thread can be profiled at a time; calls that arrive while
+        # the profiler is busy (and all calls outside a capture) run as is
+        if not self.profiling or not self._profile_lock.acquire(blocking=False):
+            self._finish_profile()
+            return fn(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(fn, *args, **kwargs)
+            finally:
+                profile.create_stats()
+                with self._lock:
+                    if self._profile_stats is None:
+                        self._profile_stats = pstats.Stats(profile)
+                    else:
+                        self._profile_stats.add(profile)
+        finally:
+            self._profile_lock.release()
+
+    def _finish_profile(self):
+        # Render the report once, on the first call after the capture ended
+        if self._profile_stats is None or self.profiling:
+            return
+        with self._lock:
+            stats, self._profile_stats = self._profile_stats, None
+        if stats is None:
+            return
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats('cumulative').print_stats(30)
+        self.profile_report = out.getvalue()
+
+    def report(self) -> Optional[str]:
+        """Text report of the last finished capture, if any"""
+        self._finish_profile()
+        return self.profile_report
+
+    def table(self) -> List[Dict]:
+        """Timer summaries as rows, slowest total first"""
+        rows = [{'name': name, **summary} for name, summary in self.timers().items()]
+        rows.sort(key=lambda row: row['mean_ms'] * row['calls'], reverse=True)
+        return rows
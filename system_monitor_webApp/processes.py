@@ -0,0 +1,81 @@
+import heapq
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import psutil
+
+
+class ProcessScanner:
+    """Top-N process scanner backed by a persistent process cache.
+
+    psutil.Process.cpu_percent() measures CPU time since the previous call
+    on the same object, so a fresh object always reports 0.0. The scanner
+    keeps Process objects between scans, keyed by (pid, create_time) so a
+    recycled pid never inherits another process's counters, and ranks them
+    with heapq.nlargest instead of sorting every process. Scans are rate
+    limited to one per `min_interval` seconds; callers in between get the
+    previous result.
+    """
+
+    def __init__(self, min_interval: float = 5.0):
+        self.min_interval = min_interval
+        self._cache: Dict[Tuple[int, float], psutil.Process] = {}
+        self._top: List[Dict] = []
+        self._top_n = 0
+        self._last_scan = None
+        self._lock = threading.Lock()
+
+    def top(self, n: int = 5) -> List[Dict]:
+        """Return the top n processes by CPU usage from the latest scan"""
+        now = time.monotonic()
+        fresh = self._last_scan is not None and now - self._last_scan < self.min_interval
+        if fresh and n <= self._top_n:
+            return self._top[:n]
+
+        # Only one scan at a time; concurrent callers reuse the last result
+        if not self._lock.acquire(blocking=False):
+            return self._top[:n]
+        try:
+            priming = not self._cache
+            self._top = self._scan(n)
+            self._top_n = n
+            # A priming scan has no readings yet, so let the next call rescan
+            self._last_scan = None if priming else time.monotonic()
+        finally:
+            self._lock.release()
+        return self._top[:n]
+
+    def _scan(self, n: int) -> List[Dict]:
+        cache = {}
+        readings = []
+        for pid in psutil.pids():
+            try:
+                proc = psutil.Process(pid)
+                key = (pid, proc.create_time())
+                cached = self._cache.get(key)
+                if cached is None:
+                    # Prime the counter; its first reading is always 0.0
+                    proc.cpu_percent(None)
+                    cache[key] = proc
+                    continue
+                cache[key] = cached
+                readings.append((cached.cpu_percent(None), pid, cached))
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+
+        # Dropping entries for processes that are gone keeps the cache bounded
+        self._cache = cache
+
+        top = []
+        for cpu, pid, proc in heapq.nlargest(n, readings, key=lambda r: r[0]):
+            try:
+                top.append({
+                    'pid': pid,
+                    'name': proc.name(),
+                    'cpu_percent': cpu,
+                    'memory_percent': proc.memory_percent()
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        return top
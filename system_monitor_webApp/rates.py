@@ -0,0 +1,88 @@
+import time
+from typing import Callable, Dict
+
+import psutil
+
+# Kernels expose either 32-bit or 64-bit interface counters
+COUNTER_32_MAX = 2 ** 32
+
+
+def counter_delta(previous: int, current: int) -> int:
+    """Return the increase of a monotonically growing counter.
+
+    A counter that went backwards either wrapped around at 32 bits or was
+    reset (e.g. the interface was re-created). A wrap is only assumed when
+    it implies a plausible increase; otherwise the counter restarted at 0.
+    """
+    if current >= previous:
+        return current - previous
+    if previous < COUNTER_32_MAX:
+        wrapped = current + COUNTER_32_MAX - previous
+        if wrapped < COUNTER_32_MAX // 2:
+            return wrapped
+    return current
+
+
+class CounterRateMeter:
+    """Per-device rates computed from successive counter snapshots.
+
+    Each call to sample() compares the devices returned by `counters_fn`
+    (a dict of psutil named tuples) with the previous call and returns true
+    per-second rates of the counters in `fields`, which maps output keys to
+    counter attributes, instead of the lifetime totals psutil reports.
+    """
+
+    fields: Dict[str, str] = {}
+
+    def __init__(self, counters_fn: Callable[[], Dict], fields: Dict[str, str] = None):
+        self.counters_fn = counters_fn
+        if fields is not None:
+            self.fields = fields
+        self._previous = None
+        self._previous_time = None
+
+    def sample(self) -> Dict[str, Dict[str, float]]:
+        """Return {device: {key: per second}} since the last call.
+
+        The first call only records a baseline and returns no rates; devices
+        that appear between calls are reported from their second sample.
+        """
+        now = time.monotonic()
+        counters = {
+            device: tuple(getattr(c, attr) for attr in self.fields.values())
+            for device, c in (self.counters_fn() or {}).items()
+        }
+        previous, previous_time = self._previous, self._previous_time
+        self._previous, self._previous_time = counters, now
+
+        if previous is None or now <= previous_time:
+            return {}
+
+        elapsed = now - previous_time
+        rates = {}
+        for device, values in counters.items():
+            if device not in previous:
+                continue
+            rates[device] = {
+                key: counter_delta(prev, value) / elapsed
+                for key, prev, value in zip(self.fields, previous[device], values)
+            }
+        return rates
+
+
+class NetworkRateMeter(CounterRateMeter):
+    """Per-NIC throughput: {nic: {'sent': bytes/s, 'recv': bytes/s}}"""
+
+    fields = {'sent': 'bytes_sent', 'recv': 'bytes_recv'}
+
+    def __init__(self, counters_fn: Callable[[], Dict] = None):
+        super().__init__(counters_fn or (lambda: psutil.net_io_counters(pernic=True)))
+
+
+class DiskRateMeter(CounterRateMeter):
+    """Per-disk IO throughput: {disk: {'read': bytes/s, 'write': bytes/s}}"""
+
+    fields = {'read': 'read_bytes', 'write': 'write_bytes'}
+
+    def __init__(self, counters_fn: Callable[[], Dict] = None):
+        super().__init__(counters_fn or (lambda: psutil.disk_io_counters(perdisk=True)))
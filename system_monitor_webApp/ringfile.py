@@ -0,0 +1,122 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+MAGIC = b'SMRING01'
+VERSION = 1
+
+# Header: magic, version, field count, capacity, head, count, then the
+# comma-separated field names padded with NUL bytes up to HEADER_SIZE
+HEADER = struct.Struct('<8sIIQQQ')
+HEADER_SIZE = 256
+
+
+class RingFile:
+    """Fixed-size, memory-mapped ring of metric samples on disk.
+
+    Layout (little endian):
+
+        0    8s   magic b'SMRING01'
+        8    u32  version
+        12   u32  number of fields n
+        16   u64  capacity (records)
+        24   u64  head (index of the next record to write)
+        32   u64  count (records written, at most capacity)
+        40   ...  field names, comma separated, NUL padded
+        256  capacity records of (n + 1) float64: time, field 1 .. field n
+
+    Records are written straight into the mapping, so appends cost no
+    syscalls; dirty pages are msync'ed at most every `flush_interval`
+    seconds to avoid fsync storms at 1 Hz. The record area is a plain
+    float64 array that NumPy can map directly, see `records()`.
+    """
+
+    def __init__(self, path: str, fields: Iterable[str], capacity: int = 24 * 3600,
+                 flush_interval: float = 30.0):
+        self.path = path
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.record_size = 8 * (len(self.fields) + 1)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        names = ','.join(self.fields).encode()
+        if len(names) > HEADER_SIZE - HEADER.size:
+            raise ValueError('Too many or too long field names for the ring file header')
+
+        size = HEADER_SIZE + capacity * self.record_size
+        fresh = not self._compatible(size)
+        if fresh and os.path.exists(path):
+            logging.warning(f"History file {path} has a different layout, starting a new one")
+
+        self._file = open(path, 'r+b' if not fresh else 'w+b')
+        if fresh:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        if fresh:
+            self._mm[:HEADER_SIZE] = (HEADER.pack(MAGIC, VERSION, len(self.fields), capacity, 0, 0)
+                                      + names).ljust(HEADER_SIZE, b'\0')
+            self._mm.flush()
+
+        _, _, _, _, self.head, self.count = HEADER.unpack_from(self._mm, 0)
+        self._data = np.frombuffer(self._mm, dtype='<f8', offset=HEADER_SIZE).reshape(
+            capacity, len(self.fields) + 1)
+
+    def _compatible(self, size: int) -> bool:
+        # Reuse an existing file only if it has exactly our layout
+        try:
+            if os.path.getsize(self.path) != size:
+                return False
+            with open(self.path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+        except OSError:
+            return False
+        magic, version, n_fields, capacity, _, _ = HEADER.unpack_from(header, 0)
+        names = header[HEADER.size:].rstrip(b'\0').decode(errors='replace')
+        return (magic == MAGIC and version == VERSION and n_fields == len(self.fields)
+                and capacity == self.capacity and names == ','.join(self.fields))
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        """Write one record; missing or None values are stored as NaN"""
+        with self._lock:
+            row = self._data[self.head]
+            row[0] = timestamp
+            for i, name in enumerate(self.fields, start=1):
+                value = values.get(name)
+                row[i] = np.nan if value is None else value
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            # Header last, so a crash mid-write at worst loses this record
+            struct.pack_into('<QQ', self._mm, 24, self.head, self.count)
+
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self._mm.flush()
+                self._last_flush = now
+
+    def records(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return copies of (times, values) in chronological order"""
+        with self._lock:
+            if self.count < self.capacity:
+                rows = self._data[:self.count].copy()
+            else:
+                rows = np.concatenate((self._data[self.head:], self._data[:self.head]))
+        return rows[:, 0], rows[:, 1:]
+
+    def close(self):
+        """Flush outstanding writes and release the mapping"""
+        with self._lock:
+            if self._mm.closed:
+                return
+            self._mm.flush()
+            # Views into the mapping must be gone before it can be closed
+            self._data = None
+            self._mm.close()
+            self._file.close()
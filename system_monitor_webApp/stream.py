@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+# Reconnect delay (milliseconds) suggested to clients turned away when full
+RETRY_MS = 5000
+
+
+def retry_event(retry_ms: int = RETRY_MS) -> bytes:
+    """SSE body telling a rejected EventSource when to reconnect"""
+    return f"retry: {retry_ms}\n\n".encode()
+
+
+class SampleBroadcaster:
+    """Fan out collector samples to Server-Sent Events subscribers.
+
+    Each sample is encoded exactly once, when the collector publishes it;
+    subscribers only wait on a condition and write the shared bytes, so
+    the per-tick cost is one serialization no matter how many screens are
+    connected.
+
+    A WSGI subscriber holds a worker thread for as long as it is connected,
+    so `max_subscribers` caps them below the server's thread count;
+    `subscribe()` returns None once the cap is reached. StreamServer serves
+    any number of clients without threads through `add_listener`.
+    """
+
+    def __init__(self, encode_fn: Callable[[Dict], str], keepalive: float = 15.0,
+                 max_subscribers: Optional[int] = None):
+        self.encode_fn = encode_fn
+        self.keepalive = keepalive
+        self.max_subscribers = max_subscribers
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._event = None
+        self._listeners = []
+        self.subscribers = 0
+
+    @property
+    def latest(self) -> Optional[bytes]:
+        """The most recent SSE message, if any sample was published yet"""
+        return self._event
+
+    def add_listener(self, callback: Callable[[bytes], None]):
+        """Register a callback invoked with every encoded SSE message"""
+        self._listeners.append(callback)
+
+    def publish(self, sample: Dict):
+        """Encode a sample and wake every subscriber (collector subscriber)"""
+        data = self.encode_fn(sample)
+        with self._cond:
+            self._seq += 1
+            self._event = event = f"id: {self._seq}\ndata: {data}\n\n".encode()
+            self._cond.notify_all()
+        for listener in self._listeners:
+            listener(event)
+
+    def subscribe(self) -> Optional['Subscription']:
+        """Return the SSE messages of a new subscriber, starting with the latest sample, or None if full"""
+        with self._cond:
+            if self.max_subscribers is not None and self.subscribers >= self.max_subscribers:
+                return None
+            self.subscribers += 1
+            seen = self._seq - 1 if self._event is not None else self._seq
+        return Subscription(self, seen)
+
+    def _next_event(self, seen: int):
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != seen, timeout=self.keepalive)
+            if self._seq == seen:
+                return seen, b": keepalive\n\n"
+            return self._seq, self._event
+
+    def _release(self):
+        with self._cond:
+            self.subscribers -= 1
+
+
+class Subscription:
+    """Iterator over the SSE messages of one subscriber.
+
+    WSGI servers call close() when the client goes away (even if the
+    response was never iterated), which frees the subscriber slot.
+    """
+
+    def __init__(self, broadcaster: SampleBroadcaster, seen: int):
+        self._broadcaster = broadcaster
+        self._seen = seen
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        if self._closed:
+            raise StopIteration
+        self._seen, event = self._broadcaster._next_event(self._seen)
+        return event
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._broadcaster._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class StreamServer:
+    """Serve a broadcaster's SSE feed on its own port from one event-loop thread.
+
+    Every client costs a socket and a one-message queue instead of a
+    thread, so streams never compete with the WSGI workers that serve the
+    dashboard and /metrics. Clients that fall behind skip to the newest
+    sample; beyond `max_clients` they get a 503 with a retry hint.
+    """
+
+    def __init__(self, broadcaster: SampleBroadcaster, host: str = '0.0.0.0', port: int = 8081,
+                 max_clients: int = 1000, request_timeout: float = 10.0):
+        self.broadcaster = broadcaster
+        self.host = host
+        self.port = port
+        self.max_clients = max_clients
+        self.request_timeout = request_timeout
+        self._clients = set()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def start(self):
+        """Bind and start serving on a daemon thread (port 0 picks a free port)"""
+        ready = threading.Event()
+        errors = []
+        self._thread = threading.Thread(target=self._run, args=(ready, errors), name='stream-server',
+                                        daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        self.broadcaster.add_listener(self._publish)
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def _run(self, ready: threading.Event, errors: list):
+        self._loop = loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            errors.append(e)
+            ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            # Hang up on every client before the loop goes away
+            server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    def _publish(self, event: bytes):
+        # Runs on the collector thread; hand the message to the event loop
+        try:
+            self._loop.call_soon_threadsafe(self._fan_out, event)
+        except RuntimeError:  # Stopped
+            pass
+
+    def _fan_out(self, event: bytes):
+        for queue in self._clients:
+            if queue.full():
+                queue.get_nowait()  # Slow client, skip straight to the newest sample
+            queue.put_nowait(event)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.request_timeout)
+            method, path = (request.split(b' ', 2) + [b'', b''])[:2]
+            if method != b'GET' or path.split(b'?')[0] != b'/stream':
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await writer.drain()
+                return
+            if len(self._clients) >= self.max_clients:
+                body = retry_event()
+                writer.write(b'HTTP/1.1 503 Service Unavailable\r\nContent-Type: text/event-stream\r\n'
+                             b'Retry-After: %d\r\nContent-Length: %d\r\nConnection: close\r\n\r\n'
+                             % (RETRY_MS // 1000, len(body)) + body)
+                await writer.drain()
+                return
+
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+                         b'Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n')
+            if self.broadcaster.latest is not None:
+                writer.write(self.broadcaster.latest)
+            await writer.drain()
+
+            queue = asyncio.Queue(maxsize=1)
+            self._clients.add(queue)
+            try:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), self.broadcaster.keepalive)
+                    except asyncio.TimeoutError:
+                        event = b": keepalive\n\n"
+                    writer.write(event)
+                    await writer.drain()
+            finally:
+                self._clients.discard(queue)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            pass
+        except Exception as e:
+            logging.error(f"Error serving stream client: {e}")
+        finally:
+            writer.close()
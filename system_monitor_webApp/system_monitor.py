@@ -1,17 +1,35 @@
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output, State
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import plotly.graph_objs as go
+import numpy as np
 import psutil
 import logging
-from collections import deque
+import argparse
+import atexit
+import json
+import shlex
+import socket
 from datetime import datetime
-import sys
+from functools import partial
+import time
 import platform
-import subprocess
 from typing import Dict, List
 import os
 from assets.styles import *
+from collector import Demand, MetricsCollector
+from history import MetricHistory
+from downsample import minmax_indices
+from rates import DiskRateMeter, NetworkRateMeter
+from processes import ProcessScanner
+from stream import RETRY_MS, SampleBroadcaster, StreamServer, retry_event
+from ringfile import RingFile
+from fleet import FleetShipper, FleetStore, decode_batch
+from instrumentation import Instrumentation
+from alerts import AlertEngine, FileSink, LogSink, Rule, WebhookSink, SEVERITY
+from plotly.subplots import make_subplots
+from exporter import MetricsExporter, OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE
+from flask import Response, request
 
 # Set up basic logging to debug
 logging.basicConfig(level=logging.INFO)
@@ -31,16 +49,27 @@ app = dash.Dash(
     assets_folder=assets_path
 )
 
-# Initialize history deques
-history = {
-    'ram': deque(maxlen=20),
-    'cpu': deque(maxlen=20),
-    'disk': deque(maxlen=20),
-    'time': deque(maxlen=20),
-    'network_sent': deque(maxlen=20),
-    'network_recv': deque(maxlen=20),
-    'temp': deque(maxlen=20)
-}
+# Timers around the collector functions and callbacks, shown on the
+# Monitor Health page
+instrumentation = Instrumentation()
+
+# Sampling interval of the background collector in seconds
+SAMPLE_INTERVAL = 1.0
+
+# History tiers as (resolution, retention) in seconds: raw samples for 10
+# minutes, 10s averages for 24 hours and 1 minute averages for 30 days
+HISTORY_TIERS = ((SAMPLE_INTERVAL, 600), (10, 24 * 3600), (60, 30 * 24 * 3600))
+
+# Windows selectable on the graphs, in seconds
+HISTORY_RANGES = [
+    {'label': '5 min', 'value': 300},
+    {'label': '1 hour', 'value': 3600},
+    {'label': '24 hours', 'value': 24 * 3600},
+    {'label': '30 days', 'value': 30 * 24 * 3600}
+]
+
+# Server-owned metric history, appended once per sampling tick
+history = MetricHistory(['ram', 'cpu', 'disk', 'network_sent', 'network_recv', 'temp'], tiers=HISTORY_TIERS)
 
 # Define color scheme
 COLORS = {
@@ -61,32 +90,126 @@ THRESHOLDS = {
     'ram': {'warning': 70, 'critical': 85},
     'cpu': {'warning': 70, 'critical': 85},
     'disk': {'warning': 80, 'critical': 90},
+    'temp': {'warning': 70, 'critical': 85},
 }
 
-def get_network_speed() -> Dict[str, float]:
-    """Get current network speeds in MB/s"""
-    net_io = psutil.net_io_counters()
+# Alert cards of the System Resources page: (key, title, unit, icon)
+ALERT_CARDS = [
+    ('ram', 'RAM Usage', '%', 'fa-memory'),
+    ('cpu', 'CPU Usage', '%', 'fa-microchip'),
+    ('disk', 'Disk Usage', '%', 'fa-hdd'),
+    ('temp', 'CPU Temp', '°C', 'fa-thermometer-half')
+]
+
+# Keeps the previous per-NIC counters between samples
+network_meter = NetworkRateMeter()
+
+@instrumentation.timed()
+def get_network_speed() -> Dict:
+    """Get current network throughput in MB/s, in total and per NIC"""
+    nics = {
+        nic: {'sent': rate['sent'] / 1024 / 1024, 'recv': rate['recv'] / 1024 / 1024}
+        for nic, rate in network_meter.sample().items()
+    }
+    # Loopback traffic never leaves the host, keep it out of the totals
+    external = [rate for nic, rate in nics.items() if not nic.lower().startswith('lo')]
     return {
-        'sent': net_io.bytes_sent / 1024 / 1024,
-        'recv': net_io.bytes_recv / 1024 / 1024
+        'sent': sum(rate['sent'] for rate in external),
+        'recv': sum(rate['recv'] for rate in external),
+        'nics': nics
     }
 
+# Per-component breakdowns shown as heatmaps: one 2-D history per group with
+# a float32 column per core, partition, disk or NIC. Columns are discovered
+# at startup (devices added later show up after a restart) and capped so
+# memory stays bounded on very large hosts
+BREAKDOWN_MAX_COLUMNS = 128
+
+# Heatmap title and unit of each breakdown group
+BREAKDOWN_VIEWS = {
+    'cpu_cores': ('CPU Usage per Core', '%'),
+    'partitions': ('Usage per Partition', '%'),
+    'disk_read': ('Disk Reads', 'MB/s'),
+    'disk_write': ('Disk Writes', 'MB/s'),
+    'nic_sent': ('Upload per Interface', 'MB/s'),
+    'nic_recv': ('Download per Interface', 'MB/s')
+}
+
+def discover_breakdowns() -> Dict[str, List[str]]:
+    """Discover the columns of every breakdown group"""
+    try:
+        partitions = [p.mountpoint for p in psutil.disk_partitions(all=False) if p.fstype != 'squashfs']
+        # Loop and RAM devices only mirror other disks' traffic
+        disks = [d for d in (psutil.disk_io_counters(perdisk=True) or {})
+                 if not d.startswith(('loop', 'ram', 'zram'))]
+        nics = list(psutil.net_io_counters(pernic=True))
+        groups = {
+            'cpu_cores': [f'cpu{i}' for i in range(psutil.cpu_count() or 1)],
+            'partitions': list(dict.fromkeys(partitions)),
+            'disk_read': disks,
+            'disk_write': disks,
+            'nic_sent': nics,
+            'nic_recv': nics
+        }
+    except Exception as e:
+        logging.error(f"Error discovering breakdown columns: {e}")
+        return {}
+    return {group: columns[:BREAKDOWN_MAX_COLUMNS] for group, columns in groups.items() if columns}
+
+# Filled once the mode is known: only the combined dashboard shows breakdowns
+breakdown_columns: Dict[str, List[str]] = {}
+breakdown_history: Dict[str, MetricHistory] = {}
+
+# Keeps the previous per-disk IO counters between samples
+disk_meter = DiskRateMeter()
+
+def partition_usage(mountpoint: str) -> float:
+    try:
+        return psutil.disk_usage(mountpoint).percent
+    except OSError:
+        return np.nan
+
+@instrumentation.timed()
+def get_breakdown(network: Dict) -> Dict[str, List[float]]:
+    """Get per-core, per-partition, per-disk and per-NIC values in column order"""
+    rows = {}
+    try:
+        if 'cpu_cores' in breakdown_columns:
+            cores = psutil.cpu_percent(interval=None, percpu=True)
+            rows['cpu_cores'] = [cores[i] if i < len(cores) else np.nan
+                                 for i in range(len(breakdown_columns['cpu_cores']))]
+        if 'partitions' in breakdown_columns:
+            rows['partitions'] = [partition_usage(m) for m in breakdown_columns['partitions']]
+        if 'disk_read' in breakdown_columns:
+            io = disk_meter.sample()
+            for group, key in (('disk_read', 'read'), ('disk_write', 'write')):
+                rows[group] = [io[d][key] / 1024 / 1024 if d in io else np.nan
+                               for d in breakdown_columns[group]]
+        if 'nic_sent' in breakdown_columns:
+            nics = network['nics']
+            for group, key in (('nic_sent', 'sent'), ('nic_recv', 'recv')):
+                rows[group] = [nics[nic][key] if nic in nics else np.nan for nic in breakdown_columns[group]]
+    except Exception as e:
+        logging.error(f"Error fetching breakdown stats: {e}")
+    return rows
+
+# Minimum seconds between two process table scans, independent of the UI refresh rate
+PROCESS_SCAN_INTERVAL = 5.0
+
+# Keeps primed Process objects between scans
+process_scanner = ProcessScanner(min_interval=PROCESS_SCAN_INTERVAL)
+
+# Process scans only run while someone views the process table or scrapes
+# /metrics, and stop this many seconds after the last request
+PROCESS_DEMAND_TTL = 30.0
+process_demand = Demand(ttl=PROCESS_DEMAND_TTL)
+
+@instrumentation.timed()
 def get_top_processes(n: int = 5) -> List[Dict]:
     """Get top n processes by CPU usage"""
-    processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-        try:
-            pinfo = proc.info
-            processes.append({
-                'pid': pinfo['pid'],
-                'name': pinfo['name'],
-                'cpu_percent': pinfo['cpu_percent'],
-                'memory_percent': pinfo['memory_percent']
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-    return sorted(processes, key=lambda x: x['cpu_percent'], reverse=True)[:n]
+    return process_scanner.top(n)
 
+@instrumentation.timed()
 def get_cpu_temperature() -> float:
     """Get CPU temperature if available"""
     try:
@@ -98,33 +221,79 @@ def get_cpu_temperature() -> float:
     except:
         return None
 
-def create_alert_card(title: str, value: float, warning: float, critical: float, unit: str = '%', icon: str = None):
-    """Create an alert card with dynamic styling based on thresholds"""
-    color = COLORS['text']
-    icon_class = icon or 'fa-check'
-    
+def alert_state(value: float, warning: float, critical: float, unit: str = '%') -> str:
+    """Threshold state of an alert card value: normal, warning or critical"""
     if unit == '%':
         if value >= critical:
-            color = COLORS['critical']
-            icon_class = 'fa-exclamation-triangle'
+            return 'critical'
         elif value >= warning:
-            color = COLORS['warning']
-            icon_class = 'fa-exclamation'
-    
+            return 'warning'
+    return 'normal'
+
+def create_alert_card(title: str, value: float, warning: float, critical: float, unit: str = '%', icon: str = None,
+                      key: str = None):
+    """Create an alert card styled by its threshold state (assets/style.css).
+
+    With a `key` the card and its value get the ids alert-<key> and
+    alert-<key>-value, so callbacks can update just the state class and the
+    value text. A card without a value is hidden.
+    """
+    state = 'hidden' if value is None else alert_state(value, warning, critical, unit)
+    ids = (lambda suffix: {'id': f'alert-{key}{suffix}'}) if key else (lambda suffix: {})
     return html.Div([
-        html.H3(title, style={'color': COLORS['text'], 'marginBottom': '10px'}),
+        html.H3(title),
         html.Div([
-            html.I(className=f'fas {icon_class}', style={'marginRight': '10px', 'color': color}),
-            html.Span(f'{value:.1f}{unit}', style={'color': color, 'fontSize': '24px', 'fontWeight': 'bold'})
+            # All state icons are sent once; the state class shows one of them
+            html.I(className=f'fas {icon or "fa-check"} icon-normal'),
+            html.I(className='fas fa-exclamation icon-warning'),
+            html.I(className='fas fa-exclamation-triangle icon-critical'),
+            html.Span('' if value is None else f'{value:.1f}{unit}', className='alert-value', **ids('-value'))
         ])
+    ], className=f'alert-card {state}', **ids(''))
+
+def create_process_table():
+    """Create the static top-processes table; callbacks only fill process-rows"""
+    return html.Table([
+        html.Thead(html.Tr([html.Th(label) for label in ['PID', 'Process Name', 'CPU Usage', 'Memory Usage']])),
+        html.Tbody(id='process-rows')
+    ], className='process-table')
+
+def skip_unchanged(values: Dict, rendered: Dict):
+    """Return (outputs, rendered) where values the client already shows are no_update.
+
+    `rendered` is the per-client dcc.Store of the values sent so far; it
+    comes back as no_update too when nothing changed.
+    """
+    rendered = dict(rendered or {})
+    outputs = []
+    for key, value in values.items():
+        if rendered.get(key) == value:
+            outputs.append(dash.no_update)
+        else:
+            outputs.append(value)
+            rendered[key] = value
+    changed = any(output is not dash.no_update for output in outputs)
+    return outputs, rendered if changed else dash.no_update
+
+def create_history_range_selector(selector_id: str = 'history-range'):
+    """Create a selector for the time window shown on the graphs"""
+    return html.Div([
+        html.Label('History: ', style={'color': COLORS['text'], 'marginRight': '10px'}),
+        dcc.RadioItems(
+            id=selector_id,
+            options=HISTORY_RANGES,
+            value=HISTORY_RANGES[0]['value'],
+            inline=True,
+            labelStyle={'color': COLORS['text'], 'marginRight': '15px'}
+        )
     ], style={
         'backgroundColor': COLORS['card_bg'],
         'padding': '20px',
         'borderRadius': '10px',
-        'flex': '1',
-        'margin': '10px',
+        'marginBottom': '20px',
         'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)',
-        'textAlign': 'center'
+        'display': 'flex',
+        'alignItems': 'center'
     })
 
 def create_refresh_rate_slider():
@@ -151,15 +320,27 @@ def create_refresh_rate_slider():
         'width': '100%'
     })
 
+def create_stats_table(headers: List[str], rows: List[List]):
+    """Create a plain table in the dashboard style"""
+    cell_style = {'color': COLORS['text'], 'textAlign': 'left', 'padding': '10px'}
+    return html.Table([
+        html.Thead(html.Tr([html.Th(header, style=cell_style) for header in headers])),
+        html.Tbody([
+            html.Tr([html.Td(cell, style=cell_style) for cell in row], className='process-row')
+            for row in rows
+        ])
+    ], style={'width': '100%'})
+
 # Function to get system statistics (RAM, CPU, and Disk)
+@instrumentation.timed()
 def get_system_stats():
     try:
         # Get memory stats
         memory = psutil.virtual_memory()
         ram = memory.percent
 
-        # Get CPU usage
-        cpu = psutil.cpu_percent(interval=1)
+        # Get CPU usage since the previous sample (non-blocking)
+        cpu = psutil.cpu_percent(interval=None)
 
         # Get Disk usage
         disk = psutil.disk_usage('/').percent
@@ -174,8 +355,541 @@ def get_system_stats():
         logging.error(f"Error fetching system stats: {e}")
         return {}
 
-# Determine whether to run in 'one' or 'multiple' mode based on command-line argument
-mode = sys.argv[1] if len(sys.argv) > 1 else 'multiple'
+@instrumentation.timed()
+def sample_metrics(processes: bool = True, breakdown: bool = True) -> Dict:
+    """Collect one snapshot of the metrics shown on the dashboard"""
+    sample = {
+        'stats': get_system_stats(),
+        'network': get_network_speed(),
+        'temp': get_cpu_temperature(),
+        'self': instrumentation.process_usage()
+    }
+    if breakdown:
+        sample['breakdown'] = get_breakdown(sample['network'])
+    if processes and process_demand.active():
+        # Rate limited by the scanner, so most ticks reuse the last scan
+        sample['processes'] = get_top_processes()
+    return sample
+
+# Prime the CPU and disk counters so the first samples aren't 0.0
+psutil.cpu_percent(interval=None)
+psutil.cpu_percent(interval=None, percpu=True)
+disk_meter.sample()
+process_scanner.top()
+
+# Optional on-disk ring file that persists history across restarts
+history_file = None
+
+def sample_values(sample: Dict) -> Dict[str, float]:
+    """Flatten a collector sample into the fields stored in history"""
+    stats = sample['stats']
+    return {
+        'ram': stats['RAM Usage (%)'],
+        'cpu': stats['CPU Usage (%)'],
+        'disk': stats['Disk Usage (%)'],
+        'network_sent': sample['network']['sent'],
+        'network_recv': sample['network']['recv'],
+        'temp': sample['temp']
+    }
+
+@instrumentation.timed()
+def record_history(sample: Dict):
+    """Append a collector sample to the shared history (and history file)"""
+    if not sample['stats']:
+        return
+    values = sample_values(sample)
+    history.append(sample['timestamp'], values)
+    if history_file is not None:
+        history_file.append(sample['timestamp'], values)
+    for group, row in sample.get('breakdown', {}).items():
+        breakdown_history[group].append_row(sample['timestamp'], row)
+
+def local_offsets(times: np.ndarray) -> np.ndarray:
+    """UTC offset in seconds in effect at each epoch timestamp.
+
+    Offsets change on quarter hours, so they are looked up once per
+    distinct quarter hour rather than once per timestamp.
+    """
+    quarters, inverse = np.unique(np.floor(times / 900) * 900, return_inverse=True)
+    offsets = np.array([datetime.fromtimestamp(q).astimezone().utcoffset().total_seconds() for q in quarters])
+    return offsets[inverse]
+
+def axis_times(times: np.ndarray) -> List[str]:
+    """Format epoch timestamps as local ISO date strings for date axes.
+
+    Each timestamp gets the offset in effect at its own time, so windows
+    spanning a DST change show the wall-clock time of every point.
+    """
+    times = np.asarray(times, dtype=float)
+    return np.datetime_as_string((times + local_offsets(times)).astype('datetime64[s]')).tolist()
+
+def parse_axis_time(value) -> float:
+    """Convert a date axis value (local ISO string) back to epoch seconds.
+
+    The local time zone rules apply the offset of that date, the inverse
+    of axis_times().
+    """
+    return datetime.fromisoformat(str(value).replace('T', ' ')).timestamp()
+
+def relayout_range(relayout: Dict):
+    """Return the (start, end) epoch range set by a zoom or pan, or None"""
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        start, end = relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    elif 'xaxis.range' in relayout:
+        start, end = relayout['xaxis.range']
+    else:
+        return None
+    try:
+        return parse_axis_time(start), parse_axis_time(end)
+    except ValueError:
+        return None
+
+def create_graph_layout(title: str, title_size: int = 18, yaxis_title: str = 'Usage (%)',
+                        yaxis_range: List[float] = [0, 100]) -> go.Layout:
+    """Create the static layout of a usage graph"""
+    return go.Layout(
+        plot_bgcolor=COLORS['card_bg'],
+        paper_bgcolor=COLORS['card_bg'],
+        font={'color': COLORS['text']},
+        title={
+            'text': title,
+            'font': {'size': title_size, 'color': COLORS['text']},
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis={
+            'title': 'Time',
+            'type': 'date',
+            'gridcolor': '#444444',
+            'showgrid': True
+        },
+        yaxis={
+            'title': yaxis_title,
+            'range': yaxis_range,
+            'rangemode': 'tozero',
+            'gridcolor': '#444444',
+            'showgrid': True
+        },
+        margin={'l': 60, 'r': 40, 't': 80, 'b': 60},
+        legend={
+            'bgcolor': COLORS['card_bg'],
+            'font': {'color': COLORS['text']},
+            'orientation': 'h',
+            'yanchor': 'bottom',
+            'y': 1.02,
+            'xanchor': 'right',
+            'x': 1
+        },
+        hovermode='x unified'
+    )
+
+# Static graph layouts, built once and only sent with full figures
+COMBINED_LAYOUT = create_graph_layout('System Resource Usage Over Time', 24)
+RAM_LAYOUT = create_graph_layout('RAM Usage Over Time')
+CPU_LAYOUT = create_graph_layout('CPU Usage Over Time')
+DISK_LAYOUT = create_graph_layout('Disk Usage Over Time')
+NETWORK_LAYOUT = create_graph_layout('Network Throughput Over Time', yaxis_title='MB/s', yaxis_range=None)
+
+# Trace names and colors of the streamed metrics
+TRACE_NAMES = {'ram': 'RAM', 'cpu': 'CPU', 'disk': 'Disk', 'network_sent': 'Upload', 'network_recv': 'Download'}
+TRACE_COLORS = {
+    'ram': COLORS['ram'],
+    'cpu': COLORS['cpu'],
+    'disk': COLORS['disk'],
+    'network_sent': COLORS['network_up'],
+    'network_recv': COLORS['network_down']
+}
+
+# Plot width in pixels assumed until the browser reports the real one
+DEFAULT_PLOT_WIDTH = 1200
+
+def build_usage_figure(window: Dict, metrics: List[str], layout: go.Layout, buckets: int,
+                       x_range: List[float] = None) -> Dict:
+    """Build a usage figure from a history window, reduced to `buckets` min/max buckets"""
+    # All traces of a graph share the envelope's rows
+    rows = minmax_indices(np.column_stack([window[metric] for metric in metrics]), buckets)
+    downsampled = len(rows) < len(window['time'])
+    times = axis_times(window['time'][rows])
+    if x_range is not None:
+        layout = go.Layout(layout)
+        layout.xaxis.range = axis_times(np.array(x_range))
+        layout.xaxis.autorange = False
+    return {
+        'data': [
+            go.Scatter(
+                x=times,
+                y=window[metric][rows].tolist(),
+                name=TRACE_NAMES[metric],
+                line=dict(color=TRACE_COLORS[metric], width=3 if not downsampled else 2),
+                mode='lines+markers' if not downsampled else 'lines'
+            ) for metric in metrics
+        ],
+        'layout': layout
+    }
+
+def update_usage_graphs(graphs: List, seconds: float, cursor: Dict, width: int = None, zoom: Dict = None):
+    """Return (figures, extendData, cursor, zoom) for streaming usage graphs.
+
+    `graphs` is a list of (graph id, metrics, layout), one per dcc.Graph. A
+    full figure is only built on page load or when the history window
+    changes. Every other tick sends just the points newer than the client's
+    cursor through extendData, capped at the window size. All graphs are
+    served from a single history read so they never drift apart. The
+    cursor also records the tier resolution and whether the figures were
+    downsampled; when either changes (e.g. the 1 hour window moves to the
+    10s tier once the raw tier no longer covers it) the figures are redrawn,
+    as extending them would mix densities and trim them to the wrong size.
+
+    Windows with more points than the plot is wide are reduced to a min/max
+    envelope of one bucket per two pixels, so payloads stay bounded by the
+    plot `width` and spikes stay visible. Those graphs aren't streamed;
+    they're redrawn whenever a whole bucket of new data has arrived.
+
+    Zooming or panning a graph (its relayoutData) fetches just the visible
+    range from the finest tier that covers it. A zoomed graph stays frozen,
+    `zoom` maps its id to the range, until it is reset by a double click or
+    the history window changes.
+    """
+    buckets = max(1, int(width or DEFAULT_PLOT_WIDTH) // 2)
+    zoom = dict(zoom or {})
+    no_updates = [dash.no_update] * len(graphs)
+    ids = [graph_id for graph_id, _, _ in graphs]
+    triggered = dash.callback_context.triggered_id
+
+    if triggered in ids:
+        relayout = dash.callback_context.triggered[0]['value'] or {}
+        x_range = relayout_range(relayout)
+        if x_range is not None:
+            i = ids.index(triggered)
+            _, metrics, layout = graphs[i]
+            window = history.query(start=x_range[0], end=x_range[1])
+            figures = list(no_updates)
+            figures[i] = build_usage_figure(window, metrics, layout, buckets, x_range)
+            zoom[triggered] = list(x_range)
+            return figures, no_updates, cursor, zoom
+        if not relayout.get('xaxis.autorange'):
+            return no_updates, no_updates, cursor, dash.no_update
+        # Zoom reset: redraw every live graph from the current window
+        zoom.pop(triggered, None)
+        cursor = None
+    elif triggered == 'history-range':
+        zoom = {}
+
+    live = [i for i, graph_id in enumerate(ids) if graph_id not in zoom]
+    figures, extend_data = list(no_updates), list(no_updates)
+
+    resolution = history.resolution_for(seconds)
+    downsampled = seconds / resolution > 2 * buckets
+    stream = (cursor is not None and triggered == 'interval-component'
+              and cursor.get('resolution') == resolution and cursor.get('downsampled') == downsampled)
+    if stream and downsampled:
+        if time.time() - cursor['time'] < seconds / buckets:
+            return figures, extend_data, cursor, zoom
+        stream = False
+
+    if not stream:
+        window = history.query(seconds=seconds)
+        for i in live:
+            _, metrics, layout = graphs[i]
+            figures[i] = build_usage_figure(window, metrics, layout, buckets)
+        cursor = {
+            'time': float(window['time'][-1]) if len(window['time']) else 0.0,
+            'resolution': resolution,
+            'downsampled': downsampled
+        }
+        return figures, extend_data, cursor, zoom
+
+    window = history.query(seconds=seconds, since=cursor['time'])
+    if not len(window['time']):
+        return figures, extend_data, cursor, zoom
+
+    times = axis_times(window['time'])
+    max_points = int(seconds // resolution)
+    for i in live:
+        _, metrics, _ = graphs[i]
+        extend_data[i] = (
+            {'x': [times] * len(metrics), 'y': [window[metric].tolist() for metric in metrics]},
+            list(range(len(metrics))),
+            max_points
+        )
+    return figures, extend_data, dict(cursor, time=float(window['time'][-1])), zoom
+
+# Time bins per heatmap, whatever the window length
+HEATMAP_BINS = 300
+
+def bin_max(times: np.ndarray, values: np.ndarray, bins: int):
+    """Reduce rows to at most `bins` time bins, keeping each bin's maximum.
+
+    The maximum (ignoring NaN) keeps a single pegged core or busy disk
+    visible however many samples fall into one bin.
+    """
+    if len(times) <= bins:
+        return times, values
+    starts = np.arange(0, len(times), -(-len(times) // bins))
+    return times[starts], np.fmax.reduceat(values, starts, axis=0)
+
+def breakdown_heatmap(group: str, seconds: float) -> Dict:
+    """Heatmap figure of a breakdown group over the last `seconds`"""
+    title, unit = BREAKDOWN_VIEWS[group]
+    columns = breakdown_columns[group]
+    times, values = breakdown_history[group].query_matrix(
+        seconds=seconds, max_points=HEATMAP_BINS * 10
+    )
+    times, values = bin_max(times, values, HEATMAP_BINS)
+    z = np.round(values.T.astype(float), 2)
+    layout = create_graph_layout(f'{title} Over Time', yaxis_title='', yaxis_range=None)
+    layout.update(height=max(300, 22 * len(columns) + 150))
+    return {
+        'data': [go.Heatmap(
+            x=axis_times(times),
+            y=list(columns),
+            z=np.where(np.isnan(z), None, z).tolist(),
+            zmin=0,
+            zmax=100 if unit == '%' else None,
+            colorscale='Inferno',
+            colorbar={'title': unit},
+            hoverongaps=False
+        )],
+        'layout': layout
+    }
+
+# Seconds a threshold must be exceeded before an alert fires (or clears),
+# and how far below a threshold a value must fall to clear it
+ALERT_SUSTAIN = 10.0
+ALERT_HYSTERESIS = 5.0
+
+# Server-side alert rules, evaluated on every sample
+ALERT_RULES = [
+    Rule(metric, levels['warning'], levels['critical'], sustain=ALERT_SUSTAIN, hysteresis=ALERT_HYSTERESIS)
+    for metric, levels in THRESHOLDS.items()
+] + [
+    # Disk filling up faster than 1% (warning) or 5% (critical) per minute
+    Rule('disk', 1 / 60, 5 / 60, sustain=60.0, hysteresis=0.5 / 60, rate=True, smoothing=60.0)
+]
+
+# Alert sinks from the command line are added once the options are parsed
+alert_engine = AlertEngine(ALERT_RULES, [LogSink()])
+
+@instrumentation.timed()
+def check_alerts(sample: Dict):
+    """Evaluate the alert rules against a collector sample"""
+    if sample['stats']:
+        alert_engine.evaluate(sample['timestamp'], sample_values(sample))
+
+# Background collector shared by every callback and client
+collector = MetricsCollector(sample_metrics, interval=SAMPLE_INTERVAL)
+collector.subscribe(record_history)
+collector.subscribe(check_alerts)
+
+def encode_stream_sample(sample: Dict) -> str:
+    """Encode a collector sample as compact JSON for the /stream endpoint"""
+    stats = sample['stats']
+    return json.dumps({
+        't': round(sample['timestamp'], 3),
+        'ram': stats.get('RAM Usage (%)'),
+        'cpu': stats.get('CPU Usage (%)'),
+        'disk': stats.get('Disk Usage (%)'),
+        'up': round(sample['network']['sent'], 4),
+        'down': round(sample['network']['recv'], 4),
+        'temp': sample['temp']
+    }, separators=(',', ':'))
+
+# Pushes every new sample to /stream subscribers, encoded once per tick
+broadcaster = SampleBroadcaster(encode_stream_sample)
+collector.subscribe(instrumentation.timed('broadcast_sample')(broadcaster.publish))
+
+# Thread-free stream listener (--stream-port), started with the server
+stream_server = None
+
+@app.server.route('/stream')
+def stream():
+    """Server-Sent Events feed of live samples.
+
+    Each subscriber here holds a worker thread, so they are capped below the
+    thread count; extra clients are told to retry later (or to use the
+    --stream-port listener, which needs no thread per client).
+    """
+    subscription = broadcaster.subscribe()
+    if subscription is None:
+        return Response(retry_event(), status=503, mimetype='text/event-stream', headers={
+            'Retry-After': str(RETRY_MS // 1000)
+        })
+    return Response(subscription, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def metric_families(sample: Dict) -> List:
+    """Map a collector sample to OpenMetrics gauge families"""
+    stats = sample['stats']
+    network = sample['network']
+    bytes_per_mb = 1024 * 1024
+    return [
+        ('system_monitor_ram_usage_percent', 'RAM usage in percent',
+         [({}, stats.get('RAM Usage (%)'))]),
+        ('system_monitor_cpu_usage_percent', 'CPU usage in percent',
+         [({}, stats.get('CPU Usage (%)'))]),
+        ('system_monitor_disk_usage_percent', 'Usage of the root filesystem in percent',
+         [({}, stats.get('Disk Usage (%)'))]),
+        ('system_monitor_cpu_temperature_celsius', 'CPU temperature in degrees Celsius',
+         [({}, sample['temp'])]),
+        ('system_monitor_network_transmit_bytes_per_second', 'Network transmit throughput',
+         [({'nic': nic}, rate['sent'] * bytes_per_mb) for nic, rate in network['nics'].items()]),
+        ('system_monitor_network_receive_bytes_per_second', 'Network receive throughput',
+         [({'nic': nic}, rate['recv'] * bytes_per_mb) for nic, rate in network['nics'].items()]),
+        ('system_monitor_top_process_cpu_percent', 'CPU usage of the top processes in percent',
+         [({'pid': p['pid'], 'name': p['name']}, p['cpu_percent']) for p in sample.get('processes', [])]),
+        ('system_monitor_top_process_memory_percent', 'Memory usage of the top processes in percent',
+         [({'pid': p['pid'], 'name': p['name']}, p['memory_percent']) for p in sample.get('processes', [])]),
+        ('system_monitor_self_resident_memory_bytes', 'Resident memory of the monitor process',
+         [({}, sample['self'].get('rss'))]),
+        ('system_monitor_self_cpu_usage_percent', 'CPU usage of the monitor process in percent of one core',
+         [({}, sample['self'].get('cpu_percent'))]),
+        ('system_monitor_alert_state', 'Alert state per rule (0 ok, 1 warning, 2 critical)',
+         [({'rule': name}, SEVERITY[state['state']]) for name, state in alert_engine.states().items()]),
+        ('system_monitor_last_sample_timestamp_seconds', 'Unix time of the exported sample',
+         [({}, sample['timestamp'])])
+    ]
+
+# Renders /metrics at most once per sampling tick
+exporter = MetricsExporter(metric_families)
+
+@app.server.route('/metrics')
+def metrics():
+    """OpenMetrics exposition of the latest sample"""
+    process_demand.touch()
+    text = exporter.render(collector.latest())
+    accept = request.headers.get('Accept', '')
+    content_type = OPENMETRICS_CONTENT_TYPE if 'application/openmetrics-text' in accept else PROMETHEUS_CONTENT_TYPE
+    return Response(text, content_type=content_type)
+
+# Start sampling in whichever process ends up serving requests (the dev
+# server's reloader parent never does, so it never samples)
+@app.server.before_request
+def ensure_collector():
+    # The fleet aggregator only displays what agents send
+    if mode != 'fleet':
+        collector.start()
+
+# Interfaces only reachable from this machine
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse the command-line options"""
+    parser = argparse.ArgumentParser(description='System monitoring dashboard')
+    parser.add_argument('mode', nargs='?', choices=['one', 'multiple', 'agent', 'fleet'], default='multiple',
+                        help="'one' for the combined dashboard, 'multiple' for separate graphs, "
+                             "'agent' to only sample and ship to an aggregator, 'fleet' to aggregate agents")
+    parser.add_argument('--server', choices=['dev', 'production'], default='dev',
+                        help="'dev' runs the Flask debug server, 'production' a multi-threaded waitress server")
+    parser.add_argument('--host', default=None,
+                        help="Interface to listen on (default: 0.0.0.0; 127.0.0.1 for 'fleet' without a token)")
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='Worker threads of the production server')
+    parser.add_argument('--connection-limit', type=int, default=100,
+                        help='Maximum concurrent connections of the production server')
+    parser.add_argument('--stream-clients', type=int, default=None,
+                        help='Maximum /stream subscribers on the web server, each holding a thread '
+                             '(default: half of --threads)')
+    parser.add_argument('--stream-port', type=int, default=None,
+                        help='Also serve /stream on this port from one event-loop thread, '
+                             'without a thread per client')
+    parser.add_argument('--history-file', default=None,
+                        help='Memory-mapped ring file that persists history across restarts')
+    parser.add_argument('--history-file-size', type=int, default=24 * 3600,
+                        help='Samples kept in the history file')
+    parser.add_argument('--history-flush-interval', type=float, default=30.0,
+                        help='Seconds between flushes of the history file to disk')
+    parser.add_argument('--aggregator', default='http://localhost:8080',
+                        help='Base URL of the fleet aggregator (agent mode)')
+    parser.add_argument('--host-id', default=socket.gethostname(),
+                        help='Name this agent reports as (agent mode)')
+    parser.add_argument('--batch-interval', type=float, default=10.0,
+                        help='Seconds between batches shipped to the aggregator (agent mode)')
+    parser.add_argument('--fleet-token', default=os.getenv('FLEET_TOKEN'),
+                        help='Shared secret agents must send to the aggregator (default: $FLEET_TOKEN)')
+    parser.add_argument('--fleet-max-hosts', type=int, default=1000,
+                        help='Maximum hosts kept by the aggregator (fleet mode)')
+    parser.add_argument('--alert-webhook', default=None,
+                        help='URL alert events are POSTed to as JSON')
+    parser.add_argument('--alert-file', default=None,
+                        help='File alert events are appended to as JSON lines')
+    args = parser.parse_args(argv)
+    # Without a token anyone reaching /ingest could invent hosts and evict the
+    # real ones, so an open aggregator only listens locally
+    open_fleet = args.mode == 'fleet' and not args.fleet_token
+    if args.host is None:
+        args.host = LOCAL_HOSTS[0] if open_fleet else '0.0.0.0'
+    elif open_fleet and args.host not in LOCAL_HOSTS:
+        parser.error(f"fleet mode on {args.host} requires --fleet-token (or $FLEET_TOKEN)")
+    return args
+
+# Determine whether to run in 'one' or 'multiple' mode based on command-line
+# arguments. Imported by a WSGI runner (waitress-serve system_monitor:server),
+# sys.argv belongs to the runner, so the options come from $MONITOR_ARGS.
+args = parse_args(None if __name__ == '__main__' else shlex.split(os.getenv('MONITOR_ARGS', '')))
+mode = args.mode
+
+# Only the combined dashboard has the Breakdown page; in other modes the
+# per-component histories are neither allocated nor sampled
+if mode == 'one':
+    breakdown_columns.update(discover_breakdowns())
+    breakdown_history.update({
+        group: MetricHistory(columns, tiers=HISTORY_TIERS, dtype=np.float32)
+        for group, columns in breakdown_columns.items()
+    })
+else:
+    collector.sample_fn = partial(sample_metrics, breakdown=False)
+
+# Leave worker threads for the dashboard and /metrics however many streams are open
+broadcaster.max_subscribers = args.stream_clients or max(1, args.threads // 2)
+
+if args.alert_webhook:
+    alert_engine.add_sink(WebhookSink(args.alert_webhook))
+if args.alert_file:
+    alert_engine.add_sink(FileSink(args.alert_file))
+
+# Reload persisted history before the collector starts appending to it
+if args.history_file:
+    history_file = RingFile(args.history_file, history.fields, capacity=args.history_file_size,
+                            flush_interval=args.history_flush_interval)
+    history.load(*history_file.records())
+    atexit.register(history_file.close)
+    logging.info(f"Loaded {history_file.count} samples from {args.history_file}")
+
+# Fleet view: hosts in the top table, hosts in the sparkline grid, grid
+# columns and the seconds of history per sparkline
+FLEET_TOP_N = 10
+FLEET_GRID_LIMIT = 48
+FLEET_GRID_COLUMNS = 6
+FLEET_SPARKLINE_SECONDS = 300
+
+# Seconds of hot-path calls captured by the Monitor Health profile button
+PROFILE_SECONDS = 10
+
+# Card style shared by the sections of the Breakdown and Monitor Health pages
+SECTION_CARD_STYLE = {
+    'backgroundColor': COLORS['card_bg'],
+    'padding': '20px',
+    'borderRadius': '10px',
+    'margin': '10px',
+    'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'
+}
+
+# Navigation button styles, sent to the browser once with the layout
+NAV_BUTTON_STYLE = {
+    'color': COLORS['text'],
+    'padding': '10px',
+    'borderRadius': '10px',
+    'cursor': 'pointer',
+    'marginRight': '10px',
+    'backgroundColor': COLORS['card_bg']
+}
+NAV_BUTTON_ACTIVE_STYLE = {
+    **NAV_BUTTON_STYLE,
+    'border': '2px solid ' + COLORS['text']
+}
 
 if mode == 'one':
     app.layout = html.Div([
@@ -192,22 +906,9 @@ if mode == 'one':
             # Navigation
             html.Div([
                 html.Div([
-                    html.Div('System Resources', id='nav-resources', style={
-                        'color': COLORS['text'],
-                        'padding': '10px',
-                        'borderRadius': '10px',
-                        'cursor': 'pointer',
-                        'marginRight': '10px',
-                        'backgroundColor': COLORS['card_bg']
-                    }),
-                    html.Div('Network & Processes', id='nav-network', style={
-                        'color': COLORS['text'],
-                        'padding': '10px',
-                        'borderRadius': '10px',
-                        'cursor': 'pointer',
-                        'marginRight': '10px',
-                        'backgroundColor': COLORS['card_bg']
-                    }),
+                    html.Div('System Resources', id='nav-resources', style=NAV_BUTTON_ACTIVE_STYLE),
+                    html.Div('Network & Processes', id='nav-network', style=NAV_BUTTON_STYLE),
+                    html.Div('Breakdown', id='nav-breakdown', style=NAV_BUTTON_STYLE),
                 ], style={
                     'display': 'flex',
                     'justifyContent': 'space-between',
@@ -221,9 +922,15 @@ if mode == 'one':
                 html.Div(id='resources-page', children=[
                     # Refresh rate slider
                     create_refresh_rate_slider(),
+
+                    # History window selector
+                    create_history_range_selector(),
                     
-                    # Stats cards container
-                    html.Div(id='alert-cards', style={
+                    # Stats cards container, built once; callbacks update the values
+                    html.Div(id='alert-cards', children=[
+                        create_alert_card(title, None, 0, 0, unit, icon, key=key)
+                        for key, title, unit, icon in ALERT_CARDS
+                    ], style={
                         'display': 'flex',
                         'flexWrap': 'wrap',
                         'justifyContent': 'space-between',
@@ -274,6 +981,20 @@ if mode == 'one':
                         }),
                     ]),
 
+                    # Network throughput graph
+                    html.Div([
+                        dcc.Graph(
+                            id='network-graph',
+                            config={'displayModeBar': False}
+                        )
+                    ], style={
+                        'backgroundColor': COLORS['card_bg'],
+                        'padding': '20px',
+                        'borderRadius': '10px',
+                        'margin': '10px',
+                        'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'
+                    }),
+
                     # Top Processes
                     html.Div([
                         html.H3('Top Processes', style={'color': COLORS['text'], 'marginBottom': '10px'}),
@@ -285,16 +1006,89 @@ if mode == 'one':
                             'margin': '10px',
                             'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)',
                             'textAlign': 'center'
-                        })
+                        }, children=create_process_table())
                     ]),
+                ]),
+
+                # Per-core / partition / disk / NIC heatmaps
+                html.Div(id='page-breakdown', style={'display': 'none'}, children=[
+                    html.Div([
+                        html.Label('Show: ', style={'color': COLORS['text'], 'marginRight': '10px'}),
+                        dcc.RadioItems(
+                            id='breakdown-group',
+                            options=[{'label': BREAKDOWN_VIEWS[group][0], 'value': group}
+                                     for group in breakdown_columns],
+                            value=next(iter(breakdown_columns), None),
+                            inline=True,
+                            labelStyle={'color': COLORS['text'], 'marginRight': '15px'}
+                        )
+                    ], style={**SECTION_CARD_STYLE, 'display': 'flex', 'alignItems': 'center'}),
+                    create_history_range_selector('breakdown-range'),
+                    html.Div([
+                        dcc.Graph(id='breakdown-heatmap', config={'displayModeBar': False})
+                    ], style=SECTION_CARD_STYLE)
+                ]),
+
+                # Monitor Health Page, hidden from the navigation (open /#health)
+                html.Div(id='page-health', style={'display': 'none'}, children=[
+                    html.H3('Monitor Health', style={'color': COLORS['text'], 'margin': '10px'}),
+                    html.Div(id='health-process', style={
+                        'display': 'flex',
+                        'flexWrap': 'wrap',
+                        'justifyContent': 'space-between'
+                    }),
+                    html.Div([
+                        html.H3('Hot Path Timers', style={'color': COLORS['text'], 'marginBottom': '10px'}),
+                        html.Div(id='health-timers')
+                    ], style=SECTION_CARD_STYLE),
+                    html.Div([
+                        html.H3('Callbacks per Client', style={'color': COLORS['text'], 'marginBottom': '10px'}),
+                        html.Div(id='health-clients')
+                    ], style=SECTION_CARD_STYLE),
+                    html.Div([
+                        html.H3('Profile', style={'color': COLORS['text'], 'marginBottom': '10px'}),
+                        html.Button(f'Capture {PROFILE_SECONDS} s profile', id='profile-button',
+                                    style=NAV_BUTTON_STYLE),
+                        html.Span(id='profile-status', style={'color': COLORS['text'], 'marginLeft': '10px'}),
+                        html.Pre(id='profile-report', style={
+                            'color': COLORS['text'],
+                            'fontSize': '12px',
+                            'overflowX': 'auto',
+                            'marginTop': '20px'
+                        })
+                    ], style=SECTION_CARD_STYLE)
                 ])
             ]),
 
+            # The URL fragment selects the hidden Monitor Health page
+            dcc.Location(id='url'),
+
             dcc.Interval(
                 id='interval-component',
                 interval=5*1000,
                 n_intervals=0
-            )
+            ),
+
+            # Timestamp of the newest point this client has been sent, per graph
+            dcc.Store(id='graph-cursor'),
+            dcc.Store(id='network-cursor'),
+
+            # Time range of each zoomed graph
+            dcc.Store(id='graph-zoom'),
+            dcc.Store(id='network-zoom'),
+
+            # Width of the widest plot in pixels, reported by the browser
+            dcc.Store(id='plot-width'),
+
+            # Card and table values each page's client currently shows
+            dcc.Store(id='resources-rendered'),
+            dcc.Store(id='network-rendered'),
+
+            # Page currently shown, set by the clientside page toggle
+            dcc.Store(id='active-page', data='resources'),
+
+            # Static navigation styles used by the clientside page toggle
+            dcc.Store(id='nav-styles', data={'default': NAV_BUTTON_STYLE, 'active': NAV_BUTTON_ACTIVE_STYLE})
         ], style={
             'backgroundColor': COLORS['background'],
             'minHeight': '100vh',
@@ -302,245 +1096,322 @@ if mode == 'one':
         })
     ])
 
-    @app.callback(
+    # Page navigation and refresh-rate changes run in the browser
+    # (assets/clientside.js) and never reach the server
+    app.clientside_callback(
+        ClientsideFunction(namespace='monitor', function_name='toggle_pages'),
         [Output('nav-resources', 'style'),
          Output('nav-network', 'style'),
+         Output('nav-breakdown', 'style'),
          Output('resources-page', 'style'),
-         Output('page-network', 'style')],
+         Output('page-network', 'style'),
+         Output('page-breakdown', 'style'),
+         Output('page-health', 'style'),
+         Output('active-page', 'data')],
         [Input('nav-resources', 'n_clicks'),
-         Input('nav-network', 'n_clicks')]
+         Input('nav-network', 'n_clicks'),
+         Input('nav-breakdown', 'n_clicks'),
+         Input('url', 'hash')],
+        [State('nav-styles', 'data')]
     )
-    def toggle_pages(res_clicks, net_clicks):
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            # Default to resources page
-            return {
-                'color': COLORS['text'],
-                'padding': '10px',
-                'borderRadius': '10px',
-                'cursor': 'pointer',
-                'marginRight': '10px',
-                'backgroundColor': COLORS['card_bg'],
-                'border': '2px solid ' + COLORS['text']
-            }, {
-                'color': COLORS['text'],
-                'padding': '10px',
-                'borderRadius': '10px',
-                'cursor': 'pointer',
-                'marginRight': '10px',
-                'backgroundColor': COLORS['card_bg']
-            }, {'display': 'block'}, {'display': 'none'}
-        
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        
-        if button_id == 'nav-resources':
-            return {
-                'color': COLORS['text'],
-                'padding': '10px',
-                'borderRadius': '10px',
-                'cursor': 'pointer',
-                'marginRight': '10px',
-                'backgroundColor': COLORS['card_bg'],
-                'border': '2px solid ' + COLORS['text']
-            }, {
-                'color': COLORS['text'],
-                'padding': '10px',
-                'borderRadius': '10px',
-                'cursor': 'pointer',
-                'marginRight': '10px',
-                'backgroundColor': COLORS['card_bg']
-            }, {'display': 'block'}, {'display': 'none'}
-        else:
-            return {
-                'color': COLORS['text'],
-                'padding': '10px',
-                'borderRadius': '10px',
-                'cursor': 'pointer',
-                'marginRight': '10px',
-                'backgroundColor': COLORS['card_bg']
-            }, {
-                'color': COLORS['text'],
-                'padding': '10px',
-                'borderRadius': '10px',
-                'cursor': 'pointer',
-                'marginRight': '10px',
-                'backgroundColor': COLORS['card_bg'],
-                'border': '2px solid ' + COLORS['text']
-            }, {'display': 'none'}, {'display': 'block'}
 
-    @app.callback(
-        [Output('interval-component', 'interval')],
-        [Input('refresh-slider', 'value')]
+    app.clientside_callback(
+        ClientsideFunction(namespace='monitor', function_name='update_interval'),
+        Output('interval-component', 'interval'),
+        Input('refresh-slider', 'value')
     )
-    def update_interval(value):
-        return [value * 1000]
 
+    # Each page has its own callback, which does nothing while the page is
+    # hidden; switching pages triggers a full rebuild of the page's graph
     @app.callback(
         [Output('combined-graph', 'figure'),
-         Output('alert-cards', 'children'),
+         Output('combined-graph', 'extendData'),
+         Output('graph-cursor', 'data'),
+         Output('graph-zoom', 'data'),
+         Output('resources-rendered', 'data')]
+        + [Output(f'alert-{key}', 'className') for key, *_ in ALERT_CARDS]
+        + [Output(f'alert-{key}-value', 'children') for key, *_ in ALERT_CARDS],
+        [Input('interval-component', 'n_intervals'),
+         Input('history-range', 'value'),
+         Input('active-page', 'data'),
+         Input('plot-width', 'data'),
+         Input('combined-graph', 'relayoutData')],
+        [State('graph-cursor', 'data'),
+         State('graph-zoom', 'data'),
+         State('resources-rendered', 'data')]
+    )
+    @instrumentation.timed()
+    def update_resources(n, history_range, page, width, relayout, cursor, zoom, rendered):
+        # Read the latest snapshot from the collector
+        snapshot = collector.latest()
+        if page != 'resources' or not snapshot or not snapshot['stats']:
+            return (dash.no_update,) * (5 + 2 * len(ALERT_CARDS))
+
+        data = snapshot['stats']
+        values = {
+            'ram': data['RAM Usage (%)'],
+            'cpu': data['CPU Usage (%)'],
+            'disk': data['Disk Usage (%)'],
+            'temp': snapshot['temp']
+        }
+
+        # Only the state class and value text of each card change; unchanged
+        # ones are skipped
+        classes, texts = {}, {}
+        for key, title, unit, icon in ALERT_CARDS:
+            value = values[key]
+            if value is None:
+                classes[key], texts[key] = 'alert-card hidden', ''
+            else:
+                state = alert_state(value, THRESHOLDS[key]['warning'], THRESHOLDS[key]['critical'], unit)
+                classes[key], texts[key] = f'alert-card {state}', f'{value:.1f}{unit}'
+        outputs, rendered = skip_unchanged(
+            {**{f'{key}-class': c for key, c in classes.items()}, **{f'{key}-value': t for key, t in texts.items()}},
+            rendered
+        )
+
+        # Rebuild the figure or stream only the newly collected points
+        figures, extend_data, cursor, zoom = update_usage_graphs(
+            [('combined-graph', ['ram', 'cpu', 'disk'], COMBINED_LAYOUT)], history_range, cursor, width, zoom
+        )
+
+        return (*figures, *extend_data, cursor, zoom, rendered, *outputs)
+
+    @app.callback(
+        [Output('network-graph', 'figure'),
+         Output('network-graph', 'extendData'),
+         Output('network-cursor', 'data'),
+         Output('network-zoom', 'data'),
          Output('network-up', 'children'),
          Output('network-down', 'children'),
-         Output('top-processes', 'children')],
-        [Input('interval-component', 'n_intervals')]
+         Output('process-rows', 'children'),
+         Output('network-rendered', 'data')],
+        [Input('interval-component', 'n_intervals'),
+         Input('history-range', 'value'),
+         Input('active-page', 'data'),
+         Input('plot-width', 'data'),
+         Input('network-graph', 'relayoutData')],
+        [State('network-cursor', 'data'),
+         State('network-zoom', 'data'),
+         State('network-rendered', 'data')]
     )
-    def update_all(n):
-        # Get system stats
-        data = get_system_stats()
-        if not data:
-            return {}, [], '', '', []
-
-        # Get temperature
-        temp = get_cpu_temperature()
-        
-        # Create alert cards
-        alert_cards = [
-            create_alert_card('RAM Usage', data['RAM Usage (%)'], THRESHOLDS['ram']['warning'], THRESHOLDS['ram']['critical'], '%', 'fa-memory'),
-            create_alert_card('CPU Usage', data['CPU Usage (%)'], THRESHOLDS['cpu']['warning'], THRESHOLDS['cpu']['critical'], '%', 'fa-microchip'),
-            create_alert_card('Disk Usage', data['Disk Usage (%)'], THRESHOLDS['disk']['warning'], THRESHOLDS['disk']['critical'], '%', 'fa-hdd')
-        ]
-        
-        # Add temperature card if available
-        if temp is not None:
-            alert_cards.append(
-                create_alert_card('CPU Temp', temp, 70, 85, '°C', 'fa-thermometer-half')
-            )
+    @instrumentation.timed()
+    def update_network(n, history_range, page, width, relayout, cursor, zoom, rendered):
+        if page != 'network':
+            return (dash.no_update,) * 8
+
+        # Keep the collector scanning processes while this page is open
+        process_demand.touch()
+        snapshot = collector.latest()
+        if not snapshot or not snapshot['stats']:
+            return (dash.no_update,) * 8
 
         # Get network stats
-        net_stats = get_network_speed()
+        net_stats = snapshot['network']
         network_up = f"{net_stats['sent']:.2f} MB/s"
         network_down = f"{net_stats['recv']:.2f} MB/s"
 
-        # Get top processes
-        processes = get_top_processes()
-        process_list = html.Table([
-            html.Thead(
-                html.Tr([
-                    html.Th('PID', style={
-                        'color': COLORS['text'],
-                        'textAlign': 'left',
-                        'padding': '10px'
-                    }),
-                    html.Th('Process Name', style={
-                        'color': COLORS['text'],
-                        'textAlign': 'left',
-                        'padding': '10px'
-                    }),
-                    html.Th('CPU Usage', style={
-                        'color': COLORS['text'],
-                        'textAlign': 'left',
-                        'padding': '10px'
-                    }),
-                    html.Th('Memory Usage', style={
-                        'color': COLORS['text'],
-                        'textAlign': 'left',
-                        'padding': '10px'
-                    })
-                ])
-            ),
+        # Get top processes (the collector starts scanning on the tick after
+        # the page opens, until then the table is empty)
+        rows = [
+            [str(p['pid']), p['name'][:40], f"{p['cpu_percent']:>6.1f}%", f"{p['memory_percent']:>6.1f}%"]
+            for p in snapshot.get('processes', [])
+        ]
+        (network_up, network_down, rows), rendered = skip_unchanged(
+            {'up': network_up, 'down': network_down, 'processes': rows}, rendered
+        )
+        if rows is not dash.no_update:
+            rows = [html.Tr([html.Td(cell) for cell in row], className='process-row') for row in rows]
+
+        # Rebuild the figure or stream only the newly collected points
+        figures, extend_data, cursor, zoom = update_usage_graphs(
+            [('network-graph', ['network_sent', 'network_recv'], NETWORK_LAYOUT)], history_range, cursor, width, zoom
+        )
+
+        return (*figures, *extend_data, cursor, zoom, network_up, network_down, rows, rendered)
+
+    @app.callback(
+        Output('breakdown-heatmap', 'figure'),
+        [Input('interval-component', 'n_intervals'),
+         Input('breakdown-group', 'value'),
+         Input('breakdown-range', 'value'),
+         Input('active-page', 'data')]
+    )
+    @instrumentation.timed()
+    def update_breakdown(n, group, seconds, page):
+        if page != 'breakdown' or group not in breakdown_history:
+            return dash.no_update
+        return breakdown_heatmap(group, seconds)
+
+    @app.callback(
+        [Output('health-process', 'children'),
+         Output('health-timers', 'children'),
+         Output('health-clients', 'children'),
+         Output('profile-report', 'children')],
+        [Input('interval-component', 'n_intervals')],
+        [State('active-page', 'data')]
+    )
+    @instrumentation.timed()
+    def update_health(n, page):
+        # Nothing to render while the page is hidden
+        if page != 'health':
+            return (dash.no_update,) * 4
+
+        snapshot = collector.latest()
+        usage = (snapshot or {}).get('self') or instrumentation.process_usage()
+        process_cards = [
+            create_alert_card('Monitor RSS', usage.get('rss', 0) / 1024 / 1024, 0, 0, ' MB', 'fa-memory'),
+            create_alert_card('Monitor CPU', usage.get('cpu_percent', 0), 100, 100, '%', 'fa-microchip'),
+            create_alert_card('Threads', usage.get('threads', 0), 0, 0, '', 'fa-stream'),
+            create_alert_card('Stream Clients',
+                              broadcaster.subscribers + (stream_server.clients if stream_server else 0),
+                              0, 0, '', 'fa-broadcast-tower')
+        ]
+
+        timers = create_stats_table(
+            ['Function', 'Calls', 'Errors', 'Mean', 'p50', 'p99', 'Max'],
+            [[row['name'], row['calls'], row['errors'], f"{row['mean_ms']:.2f} ms", f"{row['p50_ms']:.2f} ms",
+              f"{row['p99_ms']:.2f} ms", f"{row['max_ms']:.2f} ms"] for row in instrumentation.table()]
+        )
+
+        clients = create_stats_table(
+            ['Client', 'Calls', 'Callbacks'],
+            [[client, sum(counts.values()), ', '.join(f'{name}: {count}' for name, count in sorted(counts.items()))]
+             for client, counts in instrumentation.clients().items()]
+        )
+
+        return process_cards, timers, clients, instrumentation.report() or 'No profile captured yet.'
+
+    @app.callback(
+        Output('profile-status', 'children'),
+        Input('profile-button', 'n_clicks'),
+        prevent_initial_call=True
+    )
+    def start_profile(n_clicks):
+        instrumentation.start_profile(PROFILE_SECONDS)
+        return f'Profiling hot-path calls for {PROFILE_SECONDS} s...'
+
+elif mode == 'fleet':
+    # Aggregator: per-host histories fed by agents over HTTP
+    fleet_store = FleetStore(history.fields, resolution=SAMPLE_INTERVAL, max_hosts=args.fleet_max_hosts)
+
+    @app.server.route('/ingest', methods=['POST'])
+    def ingest():
+        """Accept a gzip-compressed batch of samples from an agent"""
+        if args.fleet_token:
+            if request.headers.get('Authorization') != f'Bearer {args.fleet_token}':
+                return Response('Unauthorized', status=401)
+        elif request.remote_addr not in LOCAL_HOSTS:
+            # Also covers WSGI runners, whose listening interface we don't choose
+            return Response('Set --fleet-token to accept agents from other hosts', status=403)
+        try:
+            batch = decode_batch(request.get_data(), request.headers.get('Content-Encoding') == 'gzip')
+            accepted = fleet_store.ingest(batch)
+        except Exception as e:
+            logging.warning(f"Rejected fleet batch: {e}")
+            return Response('Bad batch', status=400)
+        return Response(json.dumps({'accepted': accepted}), content_type='application/json')
+
+    app.layout = html.Div([
+        html.Div([
+            html.H1('Fleet Monitor', style={
+                'color': COLORS['text'],
+                'textAlign': 'center',
+                'fontFamily': 'Roboto',
+                'marginBottom': '30px',
+                'paddingTop': '20px'
+            }),
+
+            # Top hosts by CPU
+            html.Div([
+                html.H3(f'Top {FLEET_TOP_N} Hosts by CPU', style={'color': COLORS['text'], 'marginBottom': '10px'}),
+                html.Div(id='fleet-top')
+            ], style={
+                'backgroundColor': COLORS['card_bg'],
+                'padding': '20px',
+                'borderRadius': '10px',
+                'marginBottom': '20px',
+                'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'
+            }),
+
+            # Per-host sparkline grid
+            html.Div([
+                dcc.Graph(id='fleet-grid', config={'displayModeBar': False})
+            ], style={
+                'backgroundColor': COLORS['card_bg'],
+                'padding': '20px',
+                'borderRadius': '10px',
+                'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)'
+            }),
+
+            dcc.Interval(
+                id='interval-component',
+                interval=5*1000,
+                n_intervals=0
+            )
+        ], style={
+            'backgroundColor': COLORS['background'],
+            'minHeight': '100vh',
+            'padding': '20px'
+        })
+    ])
+
+    @app.callback(
+        [Output('fleet-top', 'children'),
+         Output('fleet-grid', 'figure')],
+        [Input('interval-component', 'n_intervals')]
+    )
+    @instrumentation.timed()
+    def update_fleet(n):
+        cell_style = {'color': COLORS['text'], 'textAlign': 'left', 'padding': '10px'}
+        top_table = html.Table([
+            html.Thead(html.Tr([
+                html.Th(label, style=cell_style) for label in ['Host', 'CPU', 'RAM', 'Disk', 'Last Seen']
+            ])),
             html.Tbody([
                 html.Tr([
-                    html.Td(str(p['pid']), style={
-                        'color': COLORS['text'],
-                        'textAlign': 'left',
-                        'padding': '10px'
-                    }),
-                    html.Td(p['name'][:40], style={
-                        'color': COLORS['text'],
-                        'textAlign': 'left',
-                        'padding': '10px'
-                    }),
-                    html.Td(f"{p['cpu_percent']:>6.1f}%", style={
-                        'color': COLORS['text'],
-                        'textAlign': 'left',
-                        'padding': '10px'
-                    }),
-                    html.Td(f"{p['memory_percent']:>6.1f}%", style={
-                        'color': COLORS['text'],
-                        'textAlign': 'left',
-                        'padding': '10px'
-                    })
-                ], style={'backgroundColor': COLORS['card_bg'], 'transition': 'background-color 0.3s'},
-                   className='process-row') for p in processes
+                    html.Td(host, style=cell_style),
+                    html.Td(f"{values['cpu']:.1f}%", style=cell_style),
+                    html.Td(f"{values.get('ram') or 0:.1f}%", style=cell_style),
+                    html.Td(f"{values.get('disk') or 0:.1f}%", style=cell_style),
+                    html.Td(datetime.fromtimestamp(values['time']).strftime('%H:%M:%S'), style=cell_style)
+                ], className='process-row') for host, values in fleet_store.top(FLEET_TOP_N)
             ])
-        ], style={
-            'backgroundColor': COLORS['card_bg'],
-            'padding': '20px',
-            'borderRadius': '10px',
-            'flex': '1',
-            'margin': '10px',
-            'boxShadow': '0 4px 6px rgba(0, 0, 0, 0.1)',
-            'textAlign': 'center'
-        })
+        ], style={'width': '100%'})
 
-        # Update history and create graph
-        current_time = datetime.now().strftime('%H:%M:%S')
-        history['ram'].append(data['RAM Usage (%)'])
-        history['cpu'].append(data['CPU Usage (%)'])
-        history['disk'].append(data['Disk Usage (%)'])
-        history['time'].append(current_time)
-
-        combined_figure = {
-            'data': [
-                go.Scatter(
-                    x=list(history['time']),
-                    y=list(history['ram']),
-                    name='RAM',
-                    line=dict(color=COLORS['ram'], width=3),
-                    mode='lines+markers'
-                ),
-                go.Scatter(
-                    x=list(history['time']),
-                    y=list(history['cpu']),
-                    name='CPU',
-                    line=dict(color=COLORS['cpu'], width=3),
-                    mode='lines+markers'
-                ),
-                go.Scatter(
-                    x=list(history['time']),
-                    y=list(history['disk']),
-                    name='Disk',
-                    line=dict(color=COLORS['disk'], width=3),
-                    mode='lines+markers'
-                )
-            ],
-            'layout': go.Layout(
-                plot_bgcolor=COLORS['card_bg'],
-                paper_bgcolor=COLORS['card_bg'],
-                font={'color': COLORS['text']},
-                title={
-                    'text': 'System Resource Usage Over Time',
-                    'font': {'size': 24, 'color': COLORS['text']},
-                    'x': 0.5,
-                    'xanchor': 'center'
-                },
-                xaxis={
-                    'title': 'Time',
-                    'gridcolor': '#444444',
-                    'showgrid': True
-                },
-                yaxis={
-                    'title': 'Usage (%)',
-                    'range': [0, 100],
-                    'gridcolor': '#444444',
-                    'showgrid': True
-                },
-                margin={'l': 60, 'r': 40, 't': 80, 'b': 60},
-                legend={
-                    'bgcolor': COLORS['card_bg'],
-                    'font': {'color': COLORS['text']},
-                    'orientation': 'h',
-                    'yanchor': 'bottom',
-                    'y': 1.02,
-                    'xanchor': 'right',
-                    'x': 1
-                },
-                hovermode='x unified'
-            )
-        }
+        # The grid shows the busiest hosts, in a stable alphabetical order
+        hosts = sorted(host for host, _ in fleet_store.top(FLEET_GRID_LIMIT))
+        if not hosts:
+            return top_table, {'data': [], 'layout': create_graph_layout('Waiting for agents...')}
 
-        return combined_figure, alert_cards, network_up, network_down, process_list
+        rows = -(-len(hosts) // FLEET_GRID_COLUMNS)
+        figure = make_subplots(rows=rows, cols=FLEET_GRID_COLUMNS, subplot_titles=hosts,
+                               vertical_spacing=0.3 / rows, horizontal_spacing=0.03)
+        for i, host in enumerate(hosts):
+            window = fleet_store.window(host, FLEET_SPARKLINE_SECONDS)
+            for metric in ('cpu', 'ram'):
+                figure.add_trace(go.Scatter(
+                    x=window['time'].tolist(),
+                    y=window[metric].tolist(),
+                    name=TRACE_NAMES[metric],
+                    line=dict(color=TRACE_COLORS[metric], width=1),
+                    hoverinfo='y',
+                    showlegend=(i == 0)
+                ), row=i // FLEET_GRID_COLUMNS + 1, col=i % FLEET_GRID_COLUMNS + 1)
+        figure.update_xaxes(visible=False)
+        figure.update_yaxes(range=[0, 100], visible=False)
+        figure.update_annotations(font={'size': 11, 'color': COLORS['text']})
+        figure.update_layout(
+            height=110 * rows + 60,
+            plot_bgcolor=COLORS['card_bg'],
+            paper_bgcolor=COLORS['card_bg'],
+            font={'color': COLORS['text']},
+            margin={'l': 10, 'r': 10, 't': 40, 'b': 10},
+            legend={'orientation': 'h', 'y': 1.0, 'yanchor': 'bottom', 'x': 1, 'xanchor': 'right'}
+        )
+        return top_table, figure
 
-else:
+elif mode == 'multiple':
     # Layout for multiple graphs (RAM, CPU, Disk each on its own graph)
     app.layout = html.Div([
         html.Div([
@@ -554,6 +1425,9 @@ else:
                 }
             ),
             
+            # History window selector
+            create_history_range_selector(),
+
             # Separate graphs container
             html.Div([
                 dcc.Graph(id='ram-graph', style={'backgroundColor': COLORS['card_bg']}),
@@ -570,7 +1444,16 @@ else:
                 id='interval-component',
                 interval=5*1000,
                 n_intervals=0
-            )
+            ),
+
+            # Timestamp of the newest point this client has been sent
+            dcc.Store(id='graph-cursor'),
+
+            # Time range of each zoomed graph
+            dcc.Store(id='graph-zoom'),
+
+            # Width of the widest plot in pixels, reported by the browser
+            dcc.Store(id='plot-width')
         ], style={
             'backgroundColor': COLORS['background'],
             'minHeight': '100vh',
@@ -582,162 +1465,113 @@ else:
     @app.callback(
         [Output('ram-graph', 'figure'),
          Output('cpu-graph', 'figure'),
-         Output('disk-graph', 'figure')],
-        [Input('interval-component', 'n_intervals')]
+         Output('disk-graph', 'figure'),
+         Output('ram-graph', 'extendData'),
+         Output('cpu-graph', 'extendData'),
+         Output('disk-graph', 'extendData'),
+         Output('graph-cursor', 'data'),
+         Output('graph-zoom', 'data')],
+        [Input('interval-component', 'n_intervals'),
+         Input('history-range', 'value'),
+         Input('plot-width', 'data'),
+         Input('ram-graph', 'relayoutData'),
+         Input('cpu-graph', 'relayoutData'),
+         Input('disk-graph', 'relayoutData')],
+        [State('graph-cursor', 'data'),
+         State('graph-zoom', 'data')]
     )
-    def update_separate_graphs(n):
-        # Fetch system stats (RAM, CPU, and Disk)
-        data = get_system_stats()
+    @instrumentation.timed()
+    def update_separate_graphs(n, history_range, width, ram_relayout, cpu_relayout, disk_relayout, cursor, zoom):
+        # Read the latest system stats (RAM, CPU, and Disk) from the collector
+        snapshot = collector.latest()
 
-        if not data:
+        if not snapshot or not snapshot['stats']:
             logging.info("No data fetched")
-            return {}, {}, {}
+            return (dash.no_update,) * 8
+
+        data = snapshot['stats']
 
         logging.info(f"Fetched data: {data}")
 
-        # Append the current time, RAM, CPU, and Disk usage to history
-        current_time = datetime.now().strftime('%H:%M:%S')  # Get the current time as a string
-        history['ram'].append(data['RAM Usage (%)'])
-        history['cpu'].append(data['CPU Usage (%)'])
-        history['disk'].append(data['Disk Usage (%)'])
-        history['time'].append(current_time)
-
-        # Create RAM Usage Line Chart
-        ram_figure = {
-            'data': [go.Scatter(
-                x=list(history['time']),
-                y=list(history['ram']),
-                name='RAM',
-                line=dict(color=COLORS['ram'], width=3),
-                mode='lines+markers'
-            )],
-            'layout': go.Layout(
-                plot_bgcolor=COLORS['card_bg'],
-                paper_bgcolor=COLORS['card_bg'],
-                font={'color': COLORS['text']},
-                title={
-                    'text': 'RAM Usage Over Time',
-                    'font': {'size': 18, 'color': COLORS['text']},
-                    'x': 0.5,
-                    'xanchor': 'center'
-                },
-                xaxis={
-                    'title': 'Time',
-                    'gridcolor': '#444444',
-                    'showgrid': True
-                },
-                yaxis={
-                    'title': 'Usage (%)',
-                    'range': [0, 100],
-                    'gridcolor': '#444444',
-                    'showgrid': True
-                },
-                margin={'l': 60, 'r': 40, 't': 80, 'b': 60},
-                legend={
-                    'bgcolor': COLORS['card_bg'],
-                    'font': {'color': COLORS['text']},
-                    'orientation': 'h',
-                    'yanchor': 'bottom',
-                    'y': 1.02,
-                    'xanchor': 'right',
-                    'x': 1
-                },
-                hovermode='x unified'
-            )
-        }
+        # Rebuild the figures or stream only the newly collected points
+        figures, extend_data, cursor, zoom = update_usage_graphs(
+            [('ram-graph', ['ram'], RAM_LAYOUT), ('cpu-graph', ['cpu'], CPU_LAYOUT), ('disk-graph', ['disk'], DISK_LAYOUT)],
+            history_range, cursor, width, zoom
+        )
 
-        # Create CPU Usage Line Chart
-        cpu_figure = {
-            'data': [go.Scatter(
-                x=list(history['time']),
-                y=list(history['cpu']),
-                name='CPU',
-                line=dict(color=COLORS['cpu'], width=3),
-                mode='lines+markers'
-            )],
-            'layout': go.Layout(
-                plot_bgcolor=COLORS['card_bg'],
-                paper_bgcolor=COLORS['card_bg'],
-                font={'color': COLORS['text']},
-                title={
-                    'text': 'CPU Usage Over Time',
-                    'font': {'size': 18, 'color': COLORS['text']},
-                    'x': 0.5,
-                    'xanchor': 'center'
-                },
-                xaxis={
-                    'title': 'Time',
-                    'gridcolor': '#444444',
-                    'showgrid': True
-                },
-                yaxis={
-                    'title': 'Usage (%)',
-                    'range': [0, 100],
-                    'gridcolor': '#444444',
-                    'showgrid': True
-                },
-                margin={'l': 60, 'r': 40, 't': 80, 'b': 60},
-                legend={
-                    'bgcolor': COLORS['card_bg'],
-                    'font': {'color': COLORS['text']},
-                    'orientation': 'h',
-                    'yanchor': 'bottom',
-                    'y': 1.02,
-                    'xanchor': 'right',
-                    'x': 1
-                },
-                hovermode='x unified'
-            )
-        }
+        return (*figures, *extend_data, cursor, zoom)
 
-        # Create Disk Usage Line Chart
-        disk_figure = {
-            'data': [go.Scatter(
-                x=list(history['time']),
-                y=list(history['disk']),
-                name='Disk',
-                line=dict(color=COLORS['disk'], width=3),
-                mode='lines+markers'
-            )],
-            'layout': go.Layout(
-                plot_bgcolor=COLORS['card_bg'],
-                paper_bgcolor=COLORS['card_bg'],
-                font={'color': COLORS['text']},
-                title={
-                    'text': 'Disk Usage Over Time',
-                    'font': {'size': 18, 'color': COLORS['text']},
-                    'x': 0.5,
-                    'xanchor': 'center'
-                },
-                xaxis={
-                    'title': 'Time',
-                    'gridcolor': '#444444',
-                    'showgrid': True
-                },
-                yaxis={
-                    'title': 'Usage (%)',
-                    'range': [0, 100],
-                    'gridcolor': '#444444',
-                    'showgrid': True
-                },
-                margin={'l': 60, 'r': 40, 't': 80, 'b': 60},
-                legend={
-                    'bgcolor': COLORS['card_bg'],
-                    'font': {'color': COLORS['text']},
-                    'orientation': 'h',
-                    'yanchor': 'bottom',
-                    'y': 1.02,
-                    'xanchor': 'right',
-                    'x': 1
-                },
-                hovermode='x unified'
-            )
-        }
+if mode in ('one', 'multiple'):
+    # Long windows are downsampled to the plot width, which only the browser
+    # knows; the store only changes (and triggers a redraw) on resize
+    app.clientside_callback(
+        ClientsideFunction(namespace='monitor', function_name='plot_width'),
+        Output('plot-width', 'data'),
+        Input('interval-component', 'n_intervals'),
+        State('plot-width', 'data')
+    )
 
-        return ram_figure, cpu_figure, disk_figure
+# WSGI entry point
+server = app.server
+
+def run_production_server(host: str, port: int, threads: int, connection_limit: int):
+    """Serve the app with waitress: one process, a pool of worker threads.
+
+    The collector, history and caches live in this process, so every
+    worker thread shares them and sampling happens once per tick no
+    matter how many requests are in flight.
+    """
+    from waitress import serve
+
+    logging.info(f"Serving on {host}:{port} with {threads} threads")
+    ensure_collector()
+    start_stream_server(host)
+    serve(server, host=host, port=port, threads=threads, connection_limit=connection_limit)
+
+def start_stream_server(host: str):
+    """Start the thread-free /stream listener if --stream-port is set"""
+    global stream_server
+    if args.stream_port is None or mode not in ('one', 'multiple') or stream_server is not None:
+        return
+    stream_server = StreamServer(broadcaster, host=host, port=args.stream_port)
+    stream_server.start()
+    logging.info(f"Streaming samples on {host}:{stream_server.port}/stream")
+
+def run_agent(aggregator: str, host_id: str, batch_interval: float, token: str = None):
+    """Headless agent: sample locally and ship batches to the aggregator"""
+    shipper = FleetShipper(aggregator, host_id, history.fields, batch_interval=batch_interval, token=token)
+    # Agents never render the process table or heatmaps, so skip those
+    agent_collector = MetricsCollector(lambda: sample_metrics(processes=False, breakdown=False),
+                                       interval=SAMPLE_INTERVAL)
+
+    def queue_sample(sample: Dict):
+        if sample['stats']:
+            shipper.add(sample['timestamp'], sample_values(sample))
+
+    agent_collector.subscribe(queue_sample)
+    agent_collector.subscribe(check_alerts)
+    agent_collector.start()
+
+    logging.info(f"Shipping samples as {host_id} to {aggregator} every {batch_interval}s")
+    try:
+        shipper.run()
+    except KeyboardInterrupt:
+        shipper.stop()
+        shipper.ship()
 
 # Run the app
-# python app.py one 
-# python app.py multiple
+# python system_monitor.py one
+# python system_monitor.py multiple
+# python system_monitor.py one --server production --threads 16
+# python system_monitor.py fleet --server production
+# python system_monitor.py agent --aggregator http://fleet-host:8080
 if __name__ == '__main__':
-    app.run_server(host='0.0.0.0', port=8081, debug=True)
\ No newline at end of file
+    if mode == 'agent':
+        run_agent(args.aggregator, args.host_id, args.batch_interval, args.fleet_token)
+    elif args.server == 'production':
+        run_production_server(args.host, args.port, args.threads, args.connection_limit)
+    else:
+        # Only in the process that serves requests, not the reloader parent
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_stream_server(args.host)
+        app.run_server(host=args.host, port=args.port, debug=True)
\ No newline at end of file
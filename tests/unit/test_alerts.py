@@ -0,0 +1,106 @@
+import pytest
+
+from alerts import CRITICAL, OK, WARNING, AlertEngine, Rule
+
+
+def feed(rule, samples):
+    """Feed (timestamp, value) pairs and return the states of the events caused"""
+    return [event['state'] for event in (rule.update(t, v) for t, v in samples) if event is not None]
+
+
+def test_levels_without_sustain():
+    rule = Rule('cpu', warning=70, critical=90)
+    assert feed(rule, [(0, 50), (1, 75), (2, 95), (3, 10)]) == [WARNING, CRITICAL, OK]
+
+
+def test_sustain_debounces_short_spikes():
+    rule = Rule('cpu', warning=70, sustain=3)
+    # Above the threshold for two seconds only
+    assert feed(rule, [(0, 80), (1, 80), (2, 80), (3, 50)]) == []
+    assert rule.state == OK
+
+    events = [rule.update(t, 80) for t in range(10, 14)]
+    assert [event is not None for event in events] == [False, False, False, True]
+    assert events[-1]['time'] == 13 and events[-1]['previous'] == OK
+
+
+def test_sustain_restarts_when_level_changes():
+    rule = Rule('cpu', warning=70, critical=90, sustain=2)
+    assert feed(rule, [(0, 80), (1, 80), (2, 80)]) == [WARNING]
+    # Critical for a second, back to warning, then critical again: the
+    # critical window starts over
+    assert feed(rule, [(3, 95), (4, 95), (5, 80), (6, 95), (7, 95)]) == []
+    assert feed(rule, [(8, 95)]) == [CRITICAL]
+
+
+def test_hysteresis_on_the_way_down():
+    rule = Rule('ram', warning=80, critical=90, hysteresis=5)
+    assert feed(rule, [(0, 91)]) == [CRITICAL]
+    # Still within 5 of the critical threshold
+    assert feed(rule, [(1, 86)]) == []
+    assert feed(rule, [(2, 84)]) == [WARNING]
+    assert feed(rule, [(3, 76)]) == []
+    assert feed(rule, [(4, 74.9)]) == [OK]
+    # Going up needs the full threshold again
+    assert feed(rule, [(5, 79)]) == []
+    assert feed(rule, [(6, 80)]) == [WARNING]
+
+
+def test_missing_and_nan_values_are_ignored():
+    rule = Rule('temp', warning=70)
+    assert rule.update(0, None) is None
+    assert rule.update(1, float('nan')) is None
+    assert rule.value is None and rule.state == OK
+
+
+def test_rate_rule_smooths_single_spikes():
+    rule = Rule('disk', warning=50, rate=True, smoothing=10)
+    # Flat, then one jump of 100 in a second
+    assert rule.update(0, 0) is None
+    assert feed(rule, [(1, 0), (2, 0), (3, 100), (4, 100), (5, 100)]) == []
+    assert rule.value == pytest.approx(0.1 * 100 * 0.9 * 0.9)
+
+
+def test_rate_rule_alerts_on_sustained_growth():
+    rule = Rule('disk', warning=50, rate=True, smoothing=10)
+    samples = [(t, 0.0) for t in range(3)] + [(t, 100.0 * (t - 2)) for t in range(3, 20)]
+    events = [event for event in (rule.update(t, v) for t, v in samples) if event is not None]
+
+    assert [event['state'] for event in events] == [WARNING]
+    # Smoothed rate after n seconds at 100/s is 100 * (1 - 0.9 ** n)
+    assert events[0]['time'] == 9
+    assert events[0]['value'] == pytest.approx(100 * (1 - 0.9 ** 7))
+
+
+def test_rate_rule_ignores_out_of_order_samples():
+    rule = Rule('disk', warning=50, rate=True)
+    rule.update(10, 0)
+    assert rule.update(10, 500) is None
+    assert rule.update(9, 1000) is None
+    assert rule.value is None
+
+
+def test_engine_only_updates_rules_of_sampled_metrics():
+    cpu, ram = Rule('cpu', warning=70), Rule('ram', warning=70)
+    engine = AlertEngine([cpu, ram])
+    events = engine.evaluate(0, {'cpu': 80, 'disk': 99})
+
+    assert [event['rule'] for event in events] == ['cpu']
+    assert ram.value is None
+    assert engine.states()['cpu'] == {'metric': 'cpu', 'state': WARNING, 'value': 80}
+
+
+def test_failing_sink_does_not_stop_evaluation():
+    received = []
+
+    def broken(event):
+        raise RuntimeError('webhook down')
+
+    engine = AlertEngine([Rule('cpu', warning=70), Rule('ram', warning=70)], sinks=[broken, received.append])
+    events = engine.evaluate(0, {'cpu': 80, 'ram': 80})
+
+    assert len(events) == 2
+    assert received == events
+    # Rules keep evaluating on later samples
+    assert [event['state'] for event in engine.evaluate(1, {'cpu': 10, 'ram': 80})] == [OK]
+    assert len(received) == 3
@@ -0,0 +1,52 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import system_monitor
+
+# Europe/Berlin switched from CET (+1) to CEST (+2) at 2024-03-31 01:00 UTC
+# and back at 2024-10-27 01:00 UTC
+SPRING_FORWARD = 1711846800
+FALL_BACK = 1729990800
+
+
+@pytest.fixture
+def berlin():
+    previous = os.environ.get('TZ')
+    os.environ['TZ'] = 'Europe/Berlin'
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ['TZ']
+    else:
+        os.environ['TZ'] = previous
+    time.tzset()
+
+
+def test_axis_times_use_the_offset_of_each_timestamp(berlin):
+    times = np.array([SPRING_FORWARD - 60, SPRING_FORWARD, SPRING_FORWARD + 60])
+    assert system_monitor.axis_times(times) == [
+        '2024-03-31T01:59:00', '2024-03-31T03:00:00', '2024-03-31T03:01:00'
+    ]
+    assert system_monitor.axis_times(np.array([FALL_BACK - 60, FALL_BACK + 3600])) == [
+        '2024-10-27T02:59:00', '2024-10-27T03:00:00'
+    ]
+
+
+def test_axis_times_round_trip_across_dst(berlin):
+    times = np.arange(SPRING_FORWARD - 7200, SPRING_FORWARD + 7200, 600, dtype=float)
+    parsed = [system_monitor.parse_axis_time(value) for value in system_monitor.axis_times(times)]
+    np.testing.assert_array_equal(parsed, times)
+
+
+def test_relayout_range_parses_plotly_values(berlin):
+    start, end = system_monitor.axis_times(np.array([SPRING_FORWARD - 3600, SPRING_FORWARD + 3600]))
+    relayout = {'xaxis.range[0]': start.replace('T', ' ') + '.5', 'xaxis.range[1]': end}
+    assert system_monitor.relayout_range(relayout) == (SPRING_FORWARD - 3600 + 0.5, SPRING_FORWARD + 3600)
+    assert system_monitor.relayout_range({'xaxis.autorange': True}) is None
+
+
+def test_axis_times_of_no_timestamps():
+    assert system_monitor.axis_times(np.array([])) == []
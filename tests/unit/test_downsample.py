@@ -0,0 +1,56 @@
+import numpy as np
+
+from downsample import minmax_indices
+
+
+def test_short_input_is_kept_whole():
+    values = np.arange(10.0)
+    np.testing.assert_array_equal(minmax_indices(values, 5), np.arange(10))
+
+
+def test_single_sample_spike_is_kept():
+    values = np.zeros(100_000)
+    values[12_345] = 99.0
+    values[54_321] = -5.0
+    rows = minmax_indices(values, 100)
+
+    assert 12_345 in rows and 54_321 in rows
+    assert values[rows].max() == 99.0 and values[rows].min() == -5.0
+
+
+def test_row_count_is_bounded_and_sorted():
+    rng = np.random.default_rng(0)
+    values = rng.random((1_000_003, 3))
+    buckets = 50
+    rows = minmax_indices(values, buckets)
+
+    assert len(rows) <= 2 * buckets * values.shape[1] + 2
+    assert rows[0] == 0 and rows[-1] == len(values) - 1
+    assert np.all(np.diff(rows) > 0)
+    # Every column's extremes survive
+    np.testing.assert_array_equal(values[rows].max(axis=0), values.max(axis=0))
+    np.testing.assert_array_equal(values[rows].min(axis=0), values.min(axis=0))
+
+
+def test_one_and_two_dimensional_inputs_agree():
+    values = np.sin(np.linspace(0, 50, 10_000))
+    np.testing.assert_array_equal(minmax_indices(values, 40), minmax_indices(values[:, None], 40))
+
+
+def test_nan_never_wins_a_partial_bucket():
+    values = np.arange(1000.0)
+    values[::2] = np.nan
+    rows = minmax_indices(values, 10)
+    assert not np.isnan(values[rows[1:-1]]).any()
+
+
+def test_all_nan_bucket_leaves_a_gap():
+    values = np.ones(1000)
+    values[500:600] = np.nan  # Exactly one whole bucket of 100 rows
+    rows = minmax_indices(values, 10)
+
+    assert len(rows) <= 2 * 10 + 2
+    gap = rows[(rows >= 500) & (rows < 600)]
+    assert len(gap) >= 1 and np.isnan(values[gap]).all()
+    # The buckets around it are untouched
+    assert not np.isnan(values[rows[(rows < 500) | (rows >= 600)]]).any()
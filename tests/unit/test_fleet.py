@@ -0,0 +1,62 @@
+import pytest
+
+from fleet import FleetStore, decode_batch, encode_batch
+
+FIELDS = ('ram', 'cpu')
+
+
+def batch(host, samples, fields=FIELDS):
+    return {'host': host, 'fields': list(fields), 'samples': samples}
+
+
+def test_batch_round_trip():
+    data = encode_batch('web-1', FIELDS, [[1.0, 40.0, None]])
+    assert decode_batch(data) == batch('web-1', [[1.0, 40.0, None]])
+
+
+def test_ingest_sorts_and_skips_retried_rows():
+    store = FleetStore(FIELDS)
+    assert store.ingest(batch('web-1', [[2.0, 20.0, 2.0], [1.0, 10.0, 1.0]])) == 2
+    # A retried batch overlapping what was stored only adds the new row
+    assert store.ingest(batch('web-1', [[1.0, 10.0, 1.0], [2.0, 20.0, 2.0], [3.0, 30.0, None]])) == 1
+    assert store.latest()['web-1'] == {'time': 3.0, 'ram': 30.0, 'cpu': None}
+
+
+def test_fields_are_matched_by_name():
+    store = FleetStore(FIELDS)
+    store.ingest(batch('web-1', [[1.0, 5.0, 50.0, 7.0]], fields=('cpu', 'ram', 'unknown')))
+    assert store.latest()['web-1'] == {'time': 1.0, 'cpu': 5.0, 'ram': 50.0}
+
+
+@pytest.mark.parametrize('bad_row', [
+    ['soon', 1.0, 1.0],
+    [float('nan'), 1.0, 1.0],
+    [],
+    'row',
+    [5.0, 'high', 1.0],
+    [True, 1.0, 1.0],
+])
+def test_malformed_row_rejects_the_whole_batch(bad_row):
+    store = FleetStore(FIELDS)
+    store.ingest(batch('web-1', [[1.0, 10.0, 1.0]]))
+
+    with pytest.raises(ValueError):
+        store.ingest(batch('web-1', [[2.0, 20.0, 2.0], bad_row, [3.0, 30.0, 3.0]]))
+    with pytest.raises(ValueError):
+        store.ingest(batch('web-2', [[2.0, 20.0, 2.0], bad_row]))
+
+    # Nothing was stored, so the agent's retry of the fixed batch adds every row
+    assert store.hosts() == ['web-1']
+    assert store.latest()['web-1']['time'] == 1.0
+    assert len(store.window('web-1', 60)['time']) == 1
+    assert store.ingest(batch('web-1', [[2.0, 20.0, 2.0], [3.0, 30.0, 3.0]])) == 2
+
+
+def test_least_recently_seen_host_is_evicted():
+    store = FleetStore(FIELDS, max_hosts=2)
+    store.ingest(batch('a', [[1.0, 1.0, 1.0]]))
+    store.ingest(batch('b', [[1.0, 1.0, 1.0]]))
+    store.ingest(batch('a', [[2.0, 1.0, 1.0]]))
+    store.ingest(batch('c', [[1.0, 1.0, 1.0]]))
+    assert store.hosts() == ['a', 'c']
+    assert 'b' not in store.latest()
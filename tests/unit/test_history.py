@@ -0,0 +1,86 @@
+import numpy as np
+
+from history import MetricHistory, Tier
+
+
+def test_bucket_averages_ignore_nan():
+    tier = Tier(10, 100, 2)
+    tier.add(100, np.array([1.0, np.nan]))
+    tier.add(105, np.array([3.0, 4.0]))
+    assert tier.count == 0  # The bucket stays open until the next one starts
+
+    tier.add(110, np.array([5.0, 6.0]))
+    times, values = tier.between(0, 200)
+    assert times.tolist() == [100]
+    assert values.tolist() == [[2.0, 4.0]]
+
+
+def test_all_nan_bucket_stores_nan():
+    tier = Tier(10, 100, 1)
+    tier.add(100, np.array([np.nan]))
+    tier.add(110, np.array([1.0]))
+    _, values = tier.between(0, 200)
+    assert np.isnan(values[0, 0])
+
+
+def test_ring_wraps_in_chronological_order():
+    tier = Tier(1, 5, 1, raw=True)
+    for t in range(8):
+        tier.add(t, np.array([float(t)]))
+
+    assert tier.count == 5
+    assert tier.oldest() == 3
+    times, values = tier.between(0, 100)
+    assert times.tolist() == [3, 4, 5, 6, 7]
+    assert values[:, 0].tolist() == [3, 4, 5, 6, 7]
+    # Ranges spanning the wrap point are read from both segments
+    assert tier.between(4, 6)[0].tolist() == [4, 5, 6]
+
+
+def test_load_keeps_last_bucket_open():
+    tier = Tier(10, 100, 1)
+    tier.load(np.array([100.0, 105.0, 110.0]), np.array([[1.0], [3.0], [5.0]]))
+    assert tier.between(0, 200)[0].tolist() == [100]
+
+    # Live samples fold into the loaded bucket instead of starting a new one
+    tier.add(115, np.array([7.0]))
+    tier.add(120, np.array([0.0]))
+    times, values = tier.between(0, 200)
+    assert times.tolist() == [100, 110]
+    assert values[:, 0].tolist() == [2.0, 6.0]
+
+
+def test_load_matches_incremental_adds():
+    times = np.arange(1000.0, 1100.0)
+    values = np.column_stack([times % 7, np.where(times % 3 == 0, np.nan, times)])
+    loaded, added = Tier(10, 50, 2), Tier(10, 50, 2)
+    loaded.load(times, values)
+    for t, row in zip(times, values):
+        added.add(t, row)
+
+    np.testing.assert_array_equal(loaded.between(0, 2000)[0], added.between(0, 2000)[0])
+    np.testing.assert_allclose(loaded.between(0, 2000)[1], added.between(0, 2000)[1])
+
+
+def test_select_tier_skips_full_tiers_that_miss_the_start():
+    history = MetricHistory(['cpu'], tiers=((1, 10), (10, 1000)))
+    for t in range(1000, 1030):
+        history.append(t, {'cpu': 1.0})
+
+    raw, coarse = history.tiers
+    assert raw.count == raw.capacity
+    assert history.select_tier(1025, 1029) is raw
+    assert history.select_tier(1005, 1029) is coarse
+    # Too many points for the raw tier
+    assert history.select_tier(1025, 1029, max_points=2) is coarse
+
+
+def test_query_since_returns_only_new_rows():
+    history = MetricHistory(['cpu', 'ram'])
+    for t in range(1000, 1010):
+        history.append(t, {'cpu': float(t), 'ram': None})
+
+    window = history.query(start=1000, end=1009, since=1006)
+    assert window['time'].tolist() == [1007, 1008, 1009]
+    assert window['cpu'].tolist() == [1007, 1008, 1009]
+    assert np.isnan(window['ram']).all()
@@ -0,0 +1,133 @@
+import io
+import json
+import sys
+import types
+
+import aws_cdk.assertions as assertions
+
+from aws_cdk_projects.incremental_deployment_handler import index
+from aws_cdk_projects.incremental_deployment_handler.index import plan
+from tests.unit.test_portfolio_cdk_app_stack import make_stack
+
+
+def entry(digest, immutable=False):
+    return {"Hash": digest, "CacheControl": "max-age=300", "ContentEncoding": "gzip",
+            "Immutable": "true" if immutable else "false"}
+
+
+def test_first_deploy_copies_everything_assets_first():
+    files = {"index.html": entry("a"), "css/style.1.css": entry("b", True)}
+    actions = plan({}, files)
+    assert actions["copy"] == ["css/style.1.css", "index.html"]
+    assert actions["delete"] == []
+    assert actions["invalidate"] == ["/", "/index.html"]
+
+
+def test_unchanged_files_are_skipped():
+    files = {"index.html": entry("a"), "css/style.1.css": entry("b", True)}
+    actions = plan({"files": files}, files)
+    assert actions == {"copy": [], "delete": [], "retired": [], "invalidate": []}
+
+
+def test_changed_asset_and_page():
+    old = {"index.html": entry("a"), "projects.html": entry("p"), "css/style.1.css": entry("b", True)}
+    new = {"index.html": entry("a2"), "projects.html": entry("p"), "css/style.2.css": entry("c", True)}
+    actions = plan({"files": old}, new)
+    assert actions["copy"] == ["css/style.2.css", "index.html"]
+    # The old stylesheet stays for one more deploy, for pages still cached
+    assert actions["retired"] == ["css/style.1.css"]
+    assert actions["delete"] == []
+    assert actions["invalidate"] == ["/", "/index.html"]
+
+
+def test_metadata_change_copies_again():
+    old = {"index.html": entry("a")}
+    new = {"index.html": dict(entry("a"), CacheControl="no-cache")}
+    assert plan({"files": old}, new)["copy"] == ["index.html"]
+
+
+def test_removed_files_are_pruned():
+    old = {"index.html": entry("a"), "old.html": entry("o")}
+    new = {"index.html": entry("a")}
+    actions = plan({"files": old, "retired": ["css/style.0.css"]}, new)
+    assert actions["delete"] == ["old.html", "css/style.0.css"]
+    assert actions["invalidate"] == ["/old.html"]
+
+
+def test_retired_file_that_returns_is_kept():
+    new = {"css/style.0.css": entry("z", True)}
+    actions = plan({"files": {}, "retired": ["css/style.0.css"]}, new)
+    assert actions["delete"] == []
+    assert actions["copy"] == ["css/style.0.css"]
+
+
+def test_incremental_stack_uses_custom_resource(tmp_path):
+    stack = make_stack(tmp_path, incremental=True)
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is("Custom::CDKBucketDeployment", 0)
+    template.resource_count_is("Custom::IncrementalDeployment", 1)
+    resource = next(iter(template.find_resources("Custom::IncrementalDeployment").values()))
+    files = resource["Properties"]["Files"]
+    assert files["index.html"]["Immutable"] == "false"
+    assert files["index.html"]["CacheControl"] == "public, max-age=300, must-revalidate"
+    assert files["index.html"]["ContentEncoding"] == "gzip"
+    stylesheets = [key for key in files if key.startswith("css/style.")]
+    assert len(stylesheets) == 1 and files[stylesheets[0]]["Immutable"] == "true"
+
+
+def test_manifest_is_kept_in_a_private_bucket(tmp_path):
+    stack = make_stack(tmp_path, incremental=True)
+    template = assertions.Template.from_stack(stack)
+
+    resource = next(iter(template.find_resources("Custom::IncrementalDeployment").values()))
+    manifest_ref = resource["Properties"]["ManifestBucket"]["Ref"]
+    assert manifest_ref != resource["Properties"]["DestinationBucket"]["Ref"]
+    bucket = template.find_resources("AWS::S3::Bucket")[manifest_ref]
+    assert bucket["Properties"]["PublicAccessBlockConfiguration"] == {
+        "BlockPublicAcls": True, "BlockPublicPolicy": True, "IgnorePublicAcls": True, "RestrictPublicBuckets": True
+    }
+
+
+class FakeS3:
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self, objects):
+        self.objects = dict(objects)
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self.exceptions.NoSuchKey()
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def copy_object(self, Bucket, Key, **kwargs):
+        self.objects[(Bucket, Key)] = b"copied"
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete["Objects"]:
+            self.objects.pop((Bucket, item["Key"]), None)
+
+
+def test_deploy_moves_the_manifest_out_of_the_site_bucket(monkeypatch):
+    files = {"index.html": dict(entry("a"), SourceBucket="assets", SourceKey="a.html"),
+             "old.html": dict(entry("o"), SourceBucket="assets", SourceKey="o.html")}
+    legacy = json.dumps({"files": {key: entry(value["Hash"]) for key, value in files.items()}}).encode()
+    s3 = FakeS3({("site", index.LEGACY_MANIFEST_KEY): legacy})
+    monkeypatch.setitem(sys.modules, "boto3", types.SimpleNamespace(client=lambda name: s3))
+
+    # The legacy manifest still tells the first deploy what is already there
+    result = index.deploy({"DestinationBucket": "site", "ManifestBucket": "private", "Files": files})
+    assert result["copy"] == 0
+
+    assert ("site", index.LEGACY_MANIFEST_KEY) not in s3.objects
+    assert not any(bucket == "site" for bucket, _ in s3.objects)
+    manifest = json.loads(s3.objects[("private", index.MANIFEST_KEY)])
+    assert sorted(manifest["files"]) == ["index.html", "old.html"]
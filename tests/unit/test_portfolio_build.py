@@ -0,0 +1,143 @@
+import gzip
+import json
+import os
+
+from aws_cdk_projects.portfolio_build import (
+    build_portfolio, hashed_path, minify_css, minify_js, render_projects, rewrite_html
+)
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb' if isinstance(content, bytes) else 'w') as f:
+        f.write(content)
+
+
+def make_site(root):
+    write(os.path.join(root, 'index.html'),
+          '<link rel="stylesheet" href="css/style.css">\n'
+          '<img src="assets/images/logo.png">\n'
+          '<link href="https://cdn.example.com/all.css">\n'
+          '<a href="projects.html">Projects</a>\n')
+    write(os.path.join(root, 'css', 'style.css'),
+          '/* Header */\nbody {\n    color: red;\n    background: url("../assets/images/logo.png");\n}\n')
+    write(os.path.join(root, 'assets', 'images', 'logo.png'), b'\x89PNG fake')
+    write(os.path.join(root, 'assets', 'images', 'README.md'), 'not published')
+
+
+def test_minify_css():
+    css = '/* comment */\n.a > .b ,\n.c {\n    color : red;\n    margin: 0 auto;\n}\n'
+    assert minify_css(css) == '.a>.b,.c{color:red;margin:0 auto}'
+
+
+def test_minify_css_keeps_selector_spaces():
+    assert minify_css('.a :hover { width: calc(100% - 2rem); }') == '.a :hover{width:calc(100% - 2rem)}'
+
+
+def test_minify_js_keeps_line_breaks_and_urls():
+    js = '// Comment\nconst url = "https://example.com";\n\n    call(url)\n'
+    assert minify_js(js) == 'const url = "https://example.com";\ncall(url)\n'
+
+
+def test_minify_js_keeps_template_literals():
+    js = ('const css = `\n'
+          '    .a {\n'
+          '        color: red;\n'
+          '    }\n'
+          '// not a comment\n'
+          '    ${items.map(item => `<li>${item}</li>`).join(\'\')}\n'
+          '`;\n'
+          '    // Comment\n'
+          '    const url = "`";\n'
+          '    done();\n')
+    assert minify_js(js) == ('const css = `\n'
+                             '    .a {\n'
+                             '        color: red;\n'
+                             '    }\n'
+                             '// not a comment\n'
+                             '    ${items.map(item => `<li>${item}</li>`).join(\'\')}\n'
+                             '`;\n'
+                             'const url = "`";\n'
+                             'done();\n')
+
+
+def test_minify_js_single_line_template_and_block_comment():
+    js = '    el.className = `a ${b}`; // trailing\n    /* a `quote\n    ` */\n    next();\n'
+    assert minify_js(js) == 'el.className = `a ${b}`; // trailing\n/* a `quote\n` */\nnext();\n'
+
+
+def test_rewrite_html_only_touches_built_files():
+    mapping = {'css/style.css': 'css/style.abc.css'}
+    html = '<link href="css/style.css"><link href="https://x.com/css/style.css"><a href="#top">'
+    assert rewrite_html('index.html', html, mapping) == (
+        '<link href="css/style.abc.css"><link href="https://x.com/css/style.css"><a href="#top">'
+    )
+
+
+PROJECT = {
+    "name": "Monitor <v2>",
+    "description": "Dashboards & alerts",
+    "icon": "fa-chart-line",
+    "tools": ["Dash", "psutil"],
+    "docUrl": "https://docs.example.com/?a=1&b=2",
+    "githubUrl": "https://github.com/example/monitor"
+}
+
+
+def test_render_projects_replaces_placeholder():
+    page = ('<main>\n    <!-- projects:start -->\n    <div class="loading-spinner"></div>\n'
+            '    <!-- projects:end -->\n</main>')
+    rendered = render_projects(page, json.dumps({"projects": [PROJECT, PROJECT]}).encode())
+
+    assert 'loading-spinner' not in rendered
+    assert rendered.count('<article class="project-card">') == 2
+    assert '    <article class="project-card">' in rendered
+    assert '<h2>Monitor &lt;v2&gt;</h2>' in rendered
+    assert '<p>Dashboards &amp; alerts</p>' in rendered
+    assert '<span>Dash</span><span>psutil</span>' in rendered
+    assert 'href="https://docs.example.com/?a=1&amp;b=2"' in rendered
+
+
+def test_render_projects_without_placeholder():
+    assert render_projects('<p>Home</p>', b'{"projects": []}') == '<p>Home</p>'
+
+
+def test_build_portfolio(tmp_path):
+    source, build = str(tmp_path / 'src'), str(tmp_path / 'build')
+    make_site(source)
+
+    mapping = build_portfolio(source, build)
+
+    logo = mapping['assets/images/logo.png']
+    assert logo == hashed_path('assets/images/logo.png', b'\x89PNG fake')
+    assert mapping['index.html'] == 'index.html'
+    assert 'assets/images/README.md' not in mapping
+
+    with open(os.path.join(build, 'hashed', logo), 'rb') as f:
+        assert f.read() == b'\x89PNG fake'
+    with open(os.path.join(build, 'hashed-gzip', mapping['css/style.css']), 'rb') as f:
+        css = gzip.decompress(f.read()).decode()
+    assert css == f'body{{color:red;background:url("../{logo}")}}'
+    with open(os.path.join(build, 'mutable-gzip', 'index.html'), 'rb') as f:
+        html = gzip.decompress(f.read()).decode()
+    assert f'href="{mapping["css/style.css"]}"' in html
+    assert f'src="{logo}"' in html
+    assert 'href="https://cdn.example.com/all.css"' in html
+    assert 'href="projects.html"' in html
+
+
+def test_build_portfolio_is_deterministic(tmp_path):
+    source = str(tmp_path / 'src')
+    make_site(source)
+
+    def snapshot(build):
+        build_portfolio(source, build)
+        files = {}
+        for root, _, names in os.walk(build):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, build)] = f.read()
+        return files
+
+    assert snapshot(str(tmp_path / 'a')) == snapshot(str(tmp_path / 'b'))
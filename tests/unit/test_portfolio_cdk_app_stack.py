@@ -1,15 +1,148 @@
+import os
+
 import aws_cdk as core
 import aws_cdk.assertions as assertions
 
 from aws_cdk_projects.portfolio_cdk_app_stack import PortfolioCdkAppStack
 
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "portfolio_files")
+
+
+def make_stack(tmp_path, **kwargs):
+    """Synthesize the stack with its build output and image cache under tmp_path"""
+    app = core.App()
+    return PortfolioCdkAppStack(app, "portfolio-cdk-app", source_dir=SOURCE_DIR,
+                                build_dir=str(tmp_path / "build"), cache_dir=str(tmp_path / "cache"), **kwargs)
+
 # example tests. To run these tests, uncomment this file along with the example
 # resource in portfolio_cdk_app/portfolio_cdk_app_stack.py
-def test_sqs_queue_created():
-    app = core.App()
-    stack = PortfolioCdkAppStack(app, "portfolio-cdk-app")
+def test_sqs_queue_created(tmp_path):
+    stack = make_stack(tmp_path)
     template = assertions.Template.from_stack(stack)
 
 #     template.has_resource_properties("AWS::SQS::Queue", {
 #         "VisibilityTimeout": 300
 #     })
+
+
+def test_portfolio_assets_deployed_with_cache_headers(tmp_path):
+    stack = make_stack(tmp_path)
+    template = assertions.Template.from_stack(stack)
+
+    # Hashed, hashed and gzipped, gzipped pages and data
+    template.resource_count_is("Custom::CDKBucketDeployment", 3)
+    template.has_resource_properties("Custom::CDKBucketDeployment", {
+        "Prune": False,
+        "SystemMetadata": {
+            "cache-control": "public, max-age=31536000, immutable",
+            "content-encoding": "gzip"
+        }
+    })
+    template.has_resource_properties("Custom::CDKBucketDeployment", {
+        "Prune": True,
+        "SystemMetadata": {
+            "cache-control": "public, max-age=300, must-revalidate",
+            "content-encoding": "gzip"
+        }
+    })
+
+
+def test_only_page_deployments_prune(tmp_path):
+    stack = make_stack(tmp_path)
+    template = assertions.Template.from_stack(stack)
+
+    deployments = {name: resource["Properties"]
+                   for name, resource in template.find_resources("Custom::CDKBucketDeployment").items()}
+    assets = [props for name, props in deployments.items() if "hashed" in name]
+    pages = [props for name, props in deployments.items() if "hashed" not in name]
+    assert len(assets) == 2 and len(pages) == 1
+
+    # Hashed assets of earlier deploys stay for pages cached by visitors
+    for props in assets:
+        assert props["Prune"] is False
+        assert "Exclude" not in props
+    # Removed pages are deleted, but pruning never touches hashed assets
+    for props in pages:
+        assert props["Prune"] is True
+        assert {"*.css", "*.js", "*.png", "*.webp", "*.avif"} <= set(props["Exclude"])
+        assert not any(pattern.endswith((".html", ".json")) for pattern in props["Exclude"])
+
+
+def cloudfront_template(tmp_path):
+    stack = make_stack(tmp_path, enable_cloudfront=True)
+    return assertions.Template.from_stack(stack)
+
+
+def test_cloudfront_distribution(tmp_path):
+    template = cloudfront_template(tmp_path)
+
+    template.resource_count_is("AWS::CloudFront::Distribution", 1)
+    template.has_resource_properties("AWS::CloudFront::Distribution", {
+        "DistributionConfig": {
+            "HttpVersion": "http2and3",
+            "DefaultRootObject": "index.html",
+            "DefaultCacheBehavior": {
+                "Compress": True,
+                "ViewerProtocolPolicy": "redirect-to-https"
+            },
+            "CacheBehaviors": assertions.Match.array_with([
+                assertions.Match.object_like({"PathPattern": pattern, "Compress": True})
+                for pattern in ("assets/*", "css/*", "js/*", "data/*")
+            ])
+        }
+    })
+
+
+def test_cloudfront_reads_private_bucket_through_oac(tmp_path):
+    template = cloudfront_template(tmp_path)
+
+    template.resource_count_is("AWS::CloudFront::OriginAccessControl", 1)
+    template.has_resource_properties("AWS::CloudFront::OriginAccessControl", {
+        "OriginAccessControlConfig": {"OriginAccessControlOriginType": "s3", "SigningBehavior": "always"}
+    })
+    template.has_resource_properties("AWS::S3::Bucket", {
+        "PublicAccessBlockConfiguration": {
+            "BlockPublicAcls": True,
+            "BlockPublicPolicy": True,
+            "IgnorePublicAcls": True,
+            "RestrictPublicBuckets": True
+        }
+    })
+    template.has_resource_properties("AWS::S3::BucketPolicy", {
+        "PolicyDocument": {
+            "Statement": assertions.Match.array_with([
+                assertions.Match.object_like({
+                    "Action": "s3:GetObject",
+                    "Principal": {"Service": "cloudfront.amazonaws.com"}
+                })
+            ])
+        }
+    })
+
+
+def test_cloudfront_cache_policies(tmp_path):
+    template = cloudfront_template(tmp_path)
+
+    template.resource_count_is("AWS::CloudFront::CachePolicy", 3)
+    for default_ttl, max_ttl in ((300, 86400), (31536000, 31536000), (60, 300)):
+        template.has_resource_properties("AWS::CloudFront::CachePolicy", {
+            "CachePolicyConfig": {
+                "DefaultTTL": default_ttl,
+                "MaxTTL": max_ttl,
+                "ParametersInCacheKeyAndForwardedToOrigin": {
+                    "EnableAcceptEncodingGzip": True,
+                    "EnableAcceptEncodingBrotli": True
+                }
+            }
+        })
+
+
+def test_cloudfront_deploy_leaves_compression_to_the_edge(tmp_path):
+    template = cloudfront_template(tmp_path)
+
+    for deployment in template.find_resources("Custom::CDKBucketDeployment").values():
+        assert "content-encoding" not in deployment["Properties"].get("SystemMetadata", {})
+    # Only unhashed pages and data are invalidated
+    template.has_resource_properties("Custom::CDKBucketDeployment", {
+        "DistributionPaths": ["/", "/data/projects.json", "/index.html", "/projects.html"]
+    })
@@ -0,0 +1,121 @@
+import io
+import os
+
+import pytest
+
+from aws_cdk_projects import portfolio_images
+from aws_cdk_projects.portfolio_build import build_portfolio
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def png(width, height, mode='RGB'):
+    out = io.BytesIO()
+    Image.new(mode, (width, height), (200, 40, 40, 255) if mode == 'RGBA' else (200, 40, 40)).save(out, 'PNG')
+    return out.getvalue()
+
+
+def make_site(root, image):
+    os.makedirs(os.path.join(root, 'img'))
+    with open(os.path.join(root, 'img', 'photo.png'), 'wb') as f:
+        f.write(image)
+    with open(os.path.join(root, 'index.html'), 'w') as f:
+        f.write('<img src="img/photo.png" sizes="200px" alt="Me">\n'
+                '<img src="img/photo.png" srcset="img/photo.png 1x" alt="Authored">\n')
+
+
+def test_variants_never_upscale():
+    variants = portfolio_images.encode_variants(png(700, 350))
+    assert sorted({v['width'] for v in variants}) == [160, 320, 640, 700]
+    assert {v['format'] for v in variants} == set(portfolio_images.modern_formats()) | {'jpg'}
+    assert next(v for v in variants if v['width'] == 320)['height'] == 160
+
+
+def test_transparent_images_fall_back_to_png():
+    variants = portfolio_images.encode_variants(png(100, 100, 'RGBA'))
+    assert variants[-1]['format'] == 'png'
+
+
+def test_variants_are_cached_by_content(tmp_path, monkeypatch):
+    data = png(400, 400)
+    first = portfolio_images.image_variants(data, str(tmp_path))
+
+    def fail(data):
+        raise AssertionError('re-encoded a cached image')
+    monkeypatch.setattr(portfolio_images, 'encode_variants', fail)
+    assert portfolio_images.image_variants(data, str(tmp_path)) == first
+
+
+def test_build_renders_picture(tmp_path):
+    source, build = str(tmp_path / 'src'), str(tmp_path / 'build')
+    make_site(source, png(400, 200))
+
+    mapping = build_portfolio(source, build, compress=False, image_cache_dir=str(tmp_path / 'cache'))
+
+    with open(os.path.join(build, 'mutable-gzip', 'index.html')) as f:
+        page, authored = f.read().splitlines()
+    assert page.startswith('<picture><source type="image/')
+    assert f'src="{mapping["img/photo-400w.jpg"]}"' in page
+    assert f'{mapping["img/photo-160w.jpg"]} 160w, ' in page
+    assert 'sizes="200px"' in page and 'alt="Me"' in page
+    assert 'width="400" height="200"' in page
+    # Tags with an authored srcset are left alone, apart from hashing
+    assert authored == (f'<img src="{mapping["img/photo.png"]}" srcset="{mapping["img/photo.png"]} 1x" '
+                        'alt="Authored">')
+    assert os.path.exists(os.path.join(build, 'hashed', mapping['img/photo-160w.jpg']))
+
+
+def test_picture_keeps_unquoted_and_boolean_attributes():
+    variants = portfolio_images.encode_variants(png(400, 200))
+    tag = '<img src=img/photo.png width=300 loading=lazy decoding=async hidden ismap alt=\'Say "hi"\' title="a&amp;b">'
+
+    picture = portfolio_images.render_responsive_images('index.html', tag, {'img/photo.png': variants})
+
+    img = picture[picture.index('<img '):]
+    assert 'width="300"' in img and 'height="200"' in img
+    assert 'loading="lazy"' in img and 'decoding="async"' in img
+    assert ' hidden ' in img and ' ismap ' in img
+    assert 'alt="Say &quot;hi&quot;"' in img
+    assert 'title="a&amp;b"' in img
+    assert 'src="img/photo-400w.jpg"' in img
+    assert portfolio_images.parse_attributes(img)['alt'] == 'Say "hi"'
+
+
+def test_build_drops_originals_only_shown_as_pictures(tmp_path):
+    source, build = str(tmp_path / 'src'), str(tmp_path / 'build')
+    make_site(source, png(400, 200))
+    with open(os.path.join(source, 'index.html'), 'w') as f:
+        f.write('<img src="img/photo.png" alt="Me">\n')
+
+    mapping = build_portfolio(source, build, compress=False)
+
+    assert 'img/photo.png' not in mapping
+    assert 'img/photo-400w.jpg' in mapping
+    published = [name for _, _, names in os.walk(os.path.join(build, 'hashed')) for name in names]
+    assert not any(name.startswith('photo.') for name in published)
+
+
+def test_build_keeps_originals_referenced_by_stylesheets(tmp_path):
+    source, build = str(tmp_path / 'src'), str(tmp_path / 'build')
+    make_site(source, png(400, 200))
+    os.makedirs(os.path.join(source, 'css'))
+    with open(os.path.join(source, 'css', 'style.css'), 'w') as f:
+        f.write('body { background: url("../img/photo.png"); }')
+    with open(os.path.join(source, 'index.html'), 'w') as f:
+        f.write('<img src="img/photo.png" alt="Me">\n')
+
+    mapping = build_portfolio(source, build, compress=False)
+
+    assert os.path.exists(os.path.join(build, 'hashed', mapping['img/photo.png']))
+
+
+def test_build_without_pillow_publishes_images_as_they_are(tmp_path, monkeypatch):
+    monkeypatch.setattr(portfolio_images, 'Image', None)
+    source, build = str(tmp_path / 'src'), str(tmp_path / 'build')
+    make_site(source, png(400, 200))
+
+    mapping = build_portfolio(source, build, compress=False)
+
+    assert sorted(mapping) == ['img/photo.png', 'index.html']
+    with open(os.path.join(build, 'mutable-gzip', 'index.html')) as f:
+        assert f.read().startswith(f'<img src="{mapping["img/photo.png"]}" sizes="200px" alt="Me">')
@@ -0,0 +1,93 @@
+import numpy as np
+
+from ringfile import HEADER_SIZE, RingFile
+
+FIELDS = ('ram', 'cpu')
+
+
+def fill(ring, start, count):
+    for t in range(start, start + count):
+        ring.append(float(t), {'ram': t * 10.0, 'cpu': None if t % 2 else t * 100.0})
+
+
+def test_reopen_after_wrap_keeps_chronological_order(tmp_path):
+    path = str(tmp_path / 'history.bin')
+    ring = RingFile(path, FIELDS, capacity=4)
+    fill(ring, 1, 6)
+    ring.close()
+
+    reopened = RingFile(path, FIELDS, capacity=4)
+    assert (reopened.head, reopened.count) == (2, 4)
+    times, values = reopened.records()
+    np.testing.assert_array_equal(times, [3, 4, 5, 6])
+    np.testing.assert_array_equal(values[:, 0], [30, 40, 50, 60])
+    np.testing.assert_array_equal(values[:, 1], [np.nan, 400, np.nan, 600])
+
+    # Appends continue where the previous process stopped
+    fill(reopened, 7, 1)
+    np.testing.assert_array_equal(reopened.records()[0], [4, 5, 6, 7])
+    reopened.close()
+
+
+def test_reopen_before_wrap(tmp_path):
+    path = str(tmp_path / 'history.bin')
+    ring = RingFile(path, FIELDS, capacity=4)
+    fill(ring, 1, 2)
+    ring.close()
+
+    reopened = RingFile(path, FIELDS, capacity=4)
+    np.testing.assert_array_equal(reopened.records()[0], [1, 2])
+    reopened.close()
+
+
+def test_different_fields_start_a_new_file(tmp_path):
+    path = str(tmp_path / 'history.bin')
+    ring = RingFile(path, FIELDS, capacity=4)
+    fill(ring, 1, 3)
+    ring.close()
+
+    # Same record width, different names
+    reopened = RingFile(path, ('ram', 'disk'), capacity=4)
+    assert reopened.count == 0
+    assert len(reopened.records()[0]) == 0
+    reopened.close()
+
+
+def test_different_capacity_starts_a_new_file(tmp_path):
+    path = str(tmp_path / 'history.bin')
+    ring = RingFile(path, FIELDS, capacity=4)
+    fill(ring, 1, 3)
+    ring.close()
+
+    reopened = RingFile(path, FIELDS, capacity=8)
+    assert reopened.count == 0
+    fill(reopened, 10, 1)
+    np.testing.assert_array_equal(reopened.records()[0], [10])
+    reopened.close()
+
+
+def test_records_readable_with_numpy_memmap(tmp_path):
+    path = str(tmp_path / 'history.bin')
+    ring = RingFile(path, FIELDS, capacity=4)
+    fill(ring, 1, 6)
+    ring.close()
+
+    # The offline recipe from the README
+    columns = len(FIELDS) + 1
+    records = np.memmap(path, dtype='<f8', mode='r', offset=HEADER_SIZE).reshape(-1, columns)
+    records = records[~np.isnan(records[:, 0]) & (records[:, 0] > 0)]
+    records = records[np.argsort(records[:, 0])]
+    np.testing.assert_array_equal(records[:, 0], [3, 4, 5, 6])
+    np.testing.assert_array_equal(records[:, 1], [30, 40, 50, 60])
+
+
+def test_unwritten_records_are_skipped_by_numpy_recipe(tmp_path):
+    path = str(tmp_path / 'history.bin')
+    ring = RingFile(path, FIELDS, capacity=4)
+    fill(ring, 1, 2)
+    ring.close()
+
+    records = np.memmap(path, dtype='<f8', mode='r', offset=HEADER_SIZE).reshape(-1, len(FIELDS) + 1)
+    assert records.shape == (4, 3)
+    records = records[~np.isnan(records[:, 0]) & (records[:, 0] > 0)]
+    np.testing.assert_array_equal(records[:, 0], [1, 2])
@@ -0,0 +1,104 @@
+import socket
+import time
+
+import pytest
+
+from stream import SampleBroadcaster, StreamServer
+
+
+def make_broadcaster(**kwargs):
+    return SampleBroadcaster(lambda sample: str(sample['value']), keepalive=0.05, **kwargs)
+
+
+def read_until(sock, marker, timeout=5.0):
+    sock.settimeout(timeout)
+    data = b''
+    while marker not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def test_subscription_starts_with_latest_sample():
+    broadcaster = make_broadcaster()
+    broadcaster.publish({'value': 1})
+    subscription = broadcaster.subscribe()
+
+    assert next(subscription) == b'id: 1\ndata: 1\n\n'
+    assert next(subscription) == b': keepalive\n\n'
+    broadcaster.publish({'value': 2})
+    assert next(subscription) == b'id: 2\ndata: 2\n\n'
+
+
+def test_subscribers_are_capped_and_released_on_close():
+    broadcaster = make_broadcaster(max_subscribers=2)
+    first, second = broadcaster.subscribe(), broadcaster.subscribe()
+
+    assert broadcaster.subscribe() is None
+    # WSGI servers close the response even if it was never iterated
+    first.close()
+    first.close()
+    assert broadcaster.subscribers == 1
+    third = broadcaster.subscribe()
+    assert third is not None
+    second.close()
+    third.close()
+    assert broadcaster.subscribers == 0
+
+
+@pytest.fixture
+def server():
+    broadcaster = make_broadcaster()
+    broadcaster.publish({'value': 1})
+    stream_server = StreamServer(broadcaster, host='127.0.0.1', port=0, max_clients=2)
+    stream_server.start()
+    yield stream_server
+    stream_server.stop()
+
+
+def connect(server, path='/stream'):
+    sock = socket.create_connection(('127.0.0.1', server.port))
+    sock.sendall(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    return sock
+
+
+def wait_for_clients(server, count):
+    deadline = time.monotonic() + 5
+    while server.clients != count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.clients == count
+
+
+def test_stream_server_pushes_samples(server):
+    with connect(server) as sock:
+        head = read_until(sock, b'data: 1\n\n')
+        assert head.startswith(b'HTTP/1.1 200 OK')
+        assert b'Content-Type: text/event-stream' in head
+
+        wait_for_clients(server, 1)
+        server.broadcaster.publish({'value': 2})
+        assert b'id: 2\ndata: 2\n\n' in read_until(sock, b'data: 2\n\n')
+
+
+def test_stream_server_rejects_clients_beyond_limit(server):
+    clients = [connect(server), connect(server)]
+    for sock in clients:
+        read_until(sock, b'data: 1\n\n')
+    wait_for_clients(server, 2)
+
+    with connect(server) as sock:
+        response = read_until(sock, b'retry:')
+    assert response.startswith(b'HTTP/1.1 503')
+    assert b'Retry-After: 5' in response
+    assert response.endswith(b'retry: 5000\n\n')
+
+    for sock in clients:
+        sock.close()
+    wait_for_clients(server, 0)
+
+
+def test_stream_server_only_serves_stream(server):
+    with connect(server, '/metrics') as sock:
+        assert read_until(sock, b'\r\n\r\n').startswith(b'HTTP/1.1 404')